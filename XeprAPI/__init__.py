@@ -7,8 +7,10 @@
 #
 
 from .main import (
-    Xepr, getXeprInstances,
-    DatasetError, DimensionError, ExperimentError, ParameterError,
+    Xepr, getXeprInstances, Batch, DispatcherStatistics, ScanCapture, Snapshot, WaitStatistics, Watch,
+    PRIORITY_CONTROL, PRIORITY_NORMAL, PRIORITY_BULK,
+    AsyncXepr, AsyncExperiment, AsyncDataset, AsyncParameter,
+    BatchError, DatasetError, DimensionError, ExperimentError, ParameterError,
 )
 
 
@@ -3,26 +3,61 @@
 """
 
 import types
+import asyncio
 import os
 import tempfile
 import re
 import ctypes
+import fnmatch
+import hashlib
+import itertools
+import json
+import queue
+import random
+import struct
+import sys
+import time
+import weakref
 from ctypes import byref
 from pipes import quote
+from collections import namedtuple
 import numpy as np
 import multiprocessing as mp
 import tkinter as tk
-from threading import RLock
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event, Lock, RLock, Thread, get_ident
 
 
 _msgprefix = 'Xepr API: '
 _encoding = 'ISO-8859-1'
 
 string_types = (str, bytes)
+_PATTERNTYPE = type(re.compile(''))
+_GLOBCHARS = re.compile(r'[*?[]')
 
 PRODELDOCSUBDIR = 'Examples'
 SUCCESS = 0
 
+# directory for caching the ProDeL documentation and the list of Xepr commands between connections
+CACHEDIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'XeprAPI')
+
+# libxeprapi refuses to push a single argument of more than 0x50000 - 2 bytes
+_MAXPUSHBYTES = 0x50000 - 2
+
+# byte budget for a single block transfer of dataset values between Xepr and XeprAPI, well below _MAXPUSHBYTES
+BLOCKTRANSFERBYTES = 1 << 18
+
+# size of the chunks bulk transfers are split into when calls go through the dispatcher thread (see Xepr.startDispatcher), so
+# that urgent calls do not have to wait for a whole transfer
+DISPATCHERCHUNKBYTES = 1 << 16
+
+# priorities of calls queued with the dispatcher thread, lower values are executed first
+PRIORITY_CONTROL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+_CONTROLFUNCTIONS = frozenset(('aqExpAbort', 'aqExpStop', 'aqExpPause', 'aqGetExpState'))
+_BULKFUNCTIONS = frozenset(('getN2DValues', 'setN2DValues'))
+
 
 class pointer(ctypes.c_int32):
 
@@ -48,8 +83,13 @@ class char(ctypes.c_char):
         return
 
 
-def _loadapilib(libxeprapi_path=None):
+# libxeprapi copies not in use by a connection, per (library path, Xepr PID); the copy for finding instances has PID None
+_apilibs = dict()
+_apilibimages = dict()
+_apiliblock = Lock()
 
+
+def _apilibpath(libxeprapi_path=None):
     if ctypes.sizeof(ctypes.c_void_p) * 8 == 32:
         libname = 'libxeprapi_32.so'
     else:
@@ -58,19 +98,185 @@ def _loadapilib(libxeprapi_path=None):
     if not libxeprapi_path:
         libxeprapi_path = os.path.dirname(os.path.realpath(__file__))
 
-    libxeprapi = os.path.join(libxeprapi_path, libname)
-    newlibname = tempfile.mkstemp(suffix='.so', prefix='lib')
+    return os.path.join(libxeprapi_path, libname)
 
-    with open(libxeprapi, 'rb') as f:
-        os.write(newlibname[0], f.read())
 
+def _dlopencopy(libxeprapi):
+    # the library keeps the state of a connection in global variables, so each connection needs a copy loaded from a different
+    # file; an in-memory file avoids touching the filesystem
+    if libxeprapi not in _apilibimages:
+        with open(libxeprapi, 'rb') as f:
+            _apilibimages[libxeprapi] = f.read()
+    image = _apilibimages[libxeprapi]
+
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('libxeprapi')
+        written = 0
+        while written < len(image):
+            written += os.write(fd, image[written:])
+        # the file descriptor stays open: the dynamic loader would return an earlier copy for a re-used /proc/self/fd path
+        libAPI = ctypes.cdll.LoadLibrary('/proc/self/fd/%u' % fd)
+        libAPI._memfd = fd
+        return libAPI
+
+    newlibname = tempfile.mkstemp(suffix='.so', prefix='lib')
+    os.write(newlibname[0], image)
     os.close(newlibname[0])
     libAPI = ctypes.cdll.LoadLibrary(newlibname[1])
     os.unlink(newlibname[1])
-
     return libAPI
 
 
+def _acquireapilib(libxeprapi_path=None, pid=None):
+    """
+    Returns a copy of the XeprAPI helper library with its own library state for connecting to the Xepr instance *pid*. Copies are
+    cached process-wide: a copy handed back by :func:`_releaseapilib` is re-used for the next connection to the same instance.
+    """
+    key = (_apilibpath(libxeprapi_path), pid)
+    with _apiliblock:
+        if _apilibs.get(key):
+            return _apilibs[key].pop()
+        libAPI = _dlopencopy(key[0])
+        libAPI._poolkey = key
+        return libAPI
+
+
+def _releaseapilib(libAPI):
+    with _apiliblock:
+        _apilibs.setdefault(libAPI._poolkey, []).append(libAPI)
+
+
+def _loadapilib(libxeprapi_path=None):
+    """
+    Returns the copy of the XeprAPI helper library used for finding Xepr instances, which is shared by the whole process.
+    """
+    key = (_apilibpath(libxeprapi_path), None)
+    with _apiliblock:
+        if not _apilibs.get(key):
+            libAPI = _dlopencopy(key[0])
+            libAPI._poolkey = key
+            _apilibs[key] = [libAPI]
+        return _apilibs[key][0]
+
+
+def _dirsignature(directory):
+    """
+    Returns a list describing modification times and sizes of the files in *directory*, which changes if any file changes.
+    """
+    try:
+        signature = [os.stat(directory).st_mtime]
+        for fname in sorted(os.listdir(directory)):
+            st = os.stat(os.path.join(directory, fname))
+            signature.append([fname, st.st_mtime, st.st_size])
+    except OSError:
+        return None
+    return signature
+
+
+def _cachefile(key):
+    return os.path.join(CACHEDIR, 'xepr-%s.json' % hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest())
+
+
+def _loadcache(key):
+    try:
+        with open(_cachefile(key)) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached['data'] if cached.get('key') == key else None
+
+
+def _storecache(key, data):
+    # write to a temporary file first, so that concurrently starting scripts never read a partially written cache file
+    try:
+        os.makedirs(CACHEDIR, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=CACHEDIR, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(key=key, data=data), f)
+        os.replace(tmpname, _cachefile(key))
+    except OSError:
+        pass
+
+
+class _ProDeLDocIndex(object):
+    """
+    Index of the ProDeL function prototypes in the documentation files of a directory, mapping each function name to the file and
+    byte range of its prototype. Unless given, the index is built in a background thread; prototypes are read from the files only
+    when asked for.
+    """
+
+    _pattern = re.compile(b'(\\w*\\s*(\\w+)[\\t]*\\([\\w\\s,]*\\))')
+
+    def __init__(self, directory, files=None, entries=None, onbuilt=None):
+        self.directory = directory
+        self.files, self.entries = files, entries
+        self._thread = None
+        if entries is None:
+            self._thread = Thread(target=self._build, args=(onbuilt,), daemon=True)
+            self._thread.start()
+
+    def _build(self, onbuilt):
+        files, entries = [], dict()
+        if os.path.isdir(self.directory):
+            files = sorted(f for f in os.listdir(self.directory) if f.endswith('.doc'))
+            for fileno, fname in enumerate(files):
+                with open(os.path.join(self.directory, fname), 'rb') as f:
+                    content = f.read()
+                for match in self._pattern.finditer(content):
+                    entries[match.group(2).decode(_encoding)] = (fileno, match.start(1), match.end(1))
+        self.files, self.entries = files, entries
+        if onbuilt is not None:
+            onbuilt(self)
+
+    def get(self, name):
+        """
+        :returns:   Prototype of the ProDeL function *name* as a string, or *None* if it is not documented.
+        """
+        if self._thread is not None:
+            self._thread.join()
+        if name not in self.entries:
+            return None
+        fileno, start, end = self.entries[name]
+        try:
+            with open(os.path.join(self.directory, self.files[fileno]), 'rb') as f:
+                f.seek(start)
+                return f.read(end - start).decode(_encoding)
+        except OSError:
+            return None
+
+
+class _XeprFunction(object):
+    # Callable representing a ProDeL function, bound to Xepr instances as a method. Its docstring is looked up in the ProDeL
+    # documentation upon first request only. The documentation index is referenced weakly, as it belongs to the connection.
+
+    def __init__(self, name, idx, args, rets, docindex):
+        self.__name__ = self.__qualname__ = name
+        self._idx, self._args, self._rets = idx, args, rets
+        self._docindex = weakref.ref(docindex)
+        self._doc = None
+
+    def __call__(self, xepr, *p):
+        if self._args < 0:
+            return xepr._callXeprfunc(self._idx, self._rets, *(p + (len(p),)))
+        if len(p) != self._args:
+            raise TypeError('%s() takes %u arguments (%u given)' % (self.__name__, self._args, len(p)))
+        return xepr._callXeprfunc(self._idx, self._rets, *p)
+
+    @property
+    def __doc__(self):
+        if self._doc is None:
+            docindex = self._docindex()
+            prototype = docindex.get(self.__name__) if docindex is not None else None
+            if prototype:
+                self._doc = prototype + '\n\nSee ProDeL documentation in Xepr for more information.'
+            else:
+                self._doc = 'See ProDeL documentation in Xepr for information.'
+        return self._doc
+
+    def __repr__(self):
+        return '<ProDeL function %s>' % self.__name__
+
+
 def _findInst(apilib):
     buf = ctypes.create_string_buffer(255)
     apilib.XeprGetSockDir(buf)
@@ -188,6 +394,13 @@ class Xepr(object):
     :param int pid:                 Connect to a specific **Xepr** instance (corresponding to this process ID). If no *pid* value is
                                     specified an **Xepr** instance will be sought out upon construction.
 
+    :param bool usecache:           If *True*, the ProDeL documentation and the list of Xepr commands are cached on disk (in
+                                    :data:`CACHEDIR`), which considerably speeds up connecting to **Xepr**. The cache is renewed
+                                    automatically if **Xepr** or its ProDeL documentation changes.
+
+    :param bool dispatcher:         If *True*, all calls to **Xepr** are executed by a dispatcher thread in the order of their
+                                    priority, see :meth:`startDispatcher`.
+
     :return:                        Instance of :class:`~Xepr`
 
     Example::
@@ -198,22 +411,39 @@ class Xepr(object):
 
     """
 
-    _lock = RLock()
-
-    def __init__(self, constantconstants=True, libxeprapi=None, verbose=False, pid=None):
+    def __init__(self, constantconstants=True, libxeprapi=None, verbose=False, pid=None, usecache=True, dispatcher=False):
+        # each connection has its own copy of libxeprapi, so only calls through the same connection need to be serialized
+        self._lock = RLock()
         self._APIopen = False
+        self._libxeprapi = libxeprapi
         self._API = _loadapilib(libxeprapi)
         self._constantconstants = constantconstants
+        self._usecache = usecache
         self.verbose = verbose
-        self._dynamicmethods = []
+        self._dynamicmethods = set()
+        self._nobulktransfer = set()
+        self._orphaneddsets = []
+        self._watcher = _Watcher()
+        self._dispatcher = None
+        self._priorities = dict()
+        self._batches = dict()
+        self._pushbuf = ctypes.create_string_buffer(16)  # scratch buffers for marshalling scalar values
+        self._popbuf = ctypes.create_string_buffer(255)
+        self._popdtype = ctypes.c_int()
         if 'XEPR_PID' not in os.environ:
             self._setDestPID(pid)
         else:
             self._setDestPID(int(os.environ['XEPR_PID']))
         self.XeprOpen()
+        if dispatcher:
+            self.startDispatcher()
 
     def __del__(self):
-        self._API.XeprDisableAPI(0)
+        if getattr(self, '_dispatcher', None) is not None:
+            self._dispatcher.stop(wait=False)
+        if getattr(self, '_connectedAPI', False):
+            self._API.XeprDisableAPI(0)
+            _releaseapilib(self._API)
 
     def _findInstances(self):
         return _findInst(self._API)
@@ -241,6 +471,8 @@ class Xepr(object):
         if not pid:
             raise IOError('%sCould not connect to any Xepr instance.' % _msgprefix)
         else:
+            self._API = _acquireapilib(self._libxeprapi, pid)
+            self._connectedAPI = True
             self._API.XeprSetInstPID(pid)
         return
 
@@ -277,46 +509,81 @@ class Xepr(object):
         numoffunctions = self._API.XeprGetFunctions(byref(namesP), byref(argsP), byref(retsP))
         if numoffunctions < SUCCESS:
             raise IOError('%sUnable to retrieve API function list' % _msgprefix)
-        self._listoffunctions = ctypes.string_at(namesP).decode(_encoding).splitlines()
-        self._listofargs = np.frombuffer(ctypes.string_at(argsP, numoffunctions), np.int8)
-        self._listofrets = np.frombuffer(ctypes.string_at(retsP, numoffunctions), bool)
+        names, args, rets = ctypes.string_at(namesP), ctypes.string_at(argsP, numoffunctions), ctypes.string_at(retsP, numoffunctions)
+        self._listoffunctions = names.decode(_encoding).splitlines()
+        self._listofargs = np.frombuffer(args, np.int8)
+        self._listofrets = np.frombuffer(rets, bool)
         prodeldirP = ctypes.c_char_p()
         self._API.XeprGetProDeLDir(byref(prodeldirP))
-        prodeldoc = self._getprodelprototypes(ctypes.string_at(prodeldirP).decode(_encoding), PRODELDOCSUBDIR)
-        self._prodeldoc = prodeldoc
+        prodeldir = ctypes.string_at(prodeldirP).decode(_encoding)
+
+        # the function list identifies the Xepr version, the documentation files the state of the ProDeL documentation
+        cachekey = [prodeldir, hashlib.sha1(names + args + rets).hexdigest(), _dirsignature(os.path.join(prodeldir, PRODELDOCSUBDIR))]
+        cached = _loadcache(cachekey) if self._usecache else None
+        self._versionkey = cachekey[:2]
+        docdir = os.path.join(prodeldir, PRODELDOCSUBDIR)
+        if cached is None or 'docindex' not in cached:
+            cached = dict(commands=self._getXeprCommands())
+
+            def storecache(docindex):
+                if self._usecache:
+                    _storecache(cachekey, dict(cached, docindex=dict(files=docindex.files, entries=docindex.entries)))
+
+            # the documentation is indexed in the background, it is only needed when someone asks for a docstring
+            self._prodeldoc = _ProDeLDocIndex(docdir, onbuilt=storecache)
+        else:
+            self._prodeldoc = _ProDeLDocIndex(docdir, **cached['docindex'])
+        functable = dict()
         for idx, func, args, rets in zip(range(len(self._listoffunctions)), self._listoffunctions, self._listofargs, self._listofrets):
-            if hasattr(self, func):
+            if hasattr(type(self), func) or func in self.__dict__ or func in functable:
                 func = '_%s_' % func
-            self._dynamicmethods.append(func)
-            returnavalue = 'True' if rets else 'False'
-
-            if args >=0:
-                if self._constantconstants and args == 0 and func.isupper() and rets:
-                    setattr(self, func, self._callXeprfunc(idx, True))
-                else:
-                    params = ', '.join(['p%u' % i for i in range(args)])
-                    setattr(self, func, types.MethodType(eval('lambda self, %s: self._callXeprfunc(%u, %s, %s)' % (params, idx, returnavalue, params)), self))
-            else:
-                setattr(self, func, types.MethodType(eval('lambda self, *p: self._callXeprfunc(%u, %s, *(p + (len(p),)))' % (idx, returnavalue)), self))
-
-            if hasattr(getattr(self, func), '__func__'):
-                if func in prodeldoc:
-                    setattr(getattr(self, func).__func__, '__doc__', prodeldoc[func] + '\n\nSee ProDeL documentation in Xepr for more information.')
-                else:
-                    setattr(getattr(self, func).__func__, '__doc__', 'See ProDeL documentation in Xepr for information.')
+            functable[func] = (idx, int(args), bool(rets))
+        self._functable = functable  # methods are bound upon first access, see __getattr__
+        self._priorities = dict()
+        for func, (idx, args, rets) in functable.items():
+            if func.strip('_') in _CONTROLFUNCTIONS:
+                self._priorities[idx] = PRIORITY_CONTROL
+            elif func.strip('_') in _BULKFUNCTIONS:
+                self._priorities[idx] = PRIORITY_BULK
 
         self._printmsg('done.', prefix='')
+        self.XeprCmds = self._cmds(self.execCmd, cached['commands'])
+
+    def _getXeprCommands(self):
         commandsP, argdescsP = ctypes.c_char_p(), ctypes.c_char_p()
         numofcommands = self._API.XeprGetXeprCommands(byref(commandsP), byref(argdescsP))
         if numofcommands < SUCCESS:
             raise IOError('%sUnable to retrieve Xepr function list' % _msgprefix)
         listofcommands = ctypes.string_at(commandsP).decode(_encoding).splitlines()
-        listofcommandargs = ctypes.string_at(argdescsP).decode(_encoding).splitlines()
-        self.XeprCmds = self._cmds()
-        self.XeprCmds._execCmd = self.execCmd
-        for cmdname, arg in zip(listofcommands, listofcommandargs):
-            if cmdname[0].isalpha():
-                setattr(self.XeprCmds, cmdname, types.MethodType(eval("lambda self, *p: self._execCmd('%s', *p)" % cmdname), self.XeprCmds))
+        return [cmdname for cmdname in listofcommands if cmdname[0].isalpha()]
+
+    def __getattr__(self, name):
+        functable = self.__dict__.get('_functable', {})
+        if name not in functable:
+            raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+        idx, args, rets = functable[name]
+        if self._constantconstants and args == 0 and name.isupper() and rets:
+            value = self._callXeprfunc(idx, True)
+        else:
+            value = types.MethodType(self._xeprfunction(name.strip('_'), idx, args, rets, self._prodeldoc), self)
+        # later accesses do not get here; if another thread got here at the same time, its value is kept
+        value = self.__dict__.setdefault(name, value)
+        self._dynamicmethods.add(name)
+        return value
+
+    def __dir__(self):
+        return sorted(set(object.__dir__(self)) | set(self.__dict__.get('_functable', ())))
+
+    # ProDeL functions per documentation index, i.e. shared by the objects of a connection and dropped along with the connection
+    _xeprfunctions = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def _xeprfunction(cls, name, idx, args, rets, docindex):
+        functions = cls._xeprfunctions.setdefault(docindex, dict())
+        key = (name, idx, args, rets)
+        if key not in functions:
+            functions[key] = _XeprFunction(name, idx, args, rets, docindex)
+        return functions[key]
 
     def getTitle(self, dset):
         buf = self.Xeprbuf(1024)
@@ -381,6 +648,14 @@ class Xepr(object):
                             dataset is to be created.
         :type iscomplex:    True or False; default = False
 
+        :param bulktransfer: If *True*, 1D ordinates and the abscissas are read from and written to **Xepr** in large blocks
+                            rather than value by value.
+        :type bulktransfer: True or False; default = True
+
+        :param lazy:        If *True*, the ordinate of a 2D dataset is not retrieved as a whole; instead, :attr:`~Dataset.O` is a
+                            :class:`~LazyOrdinate` which fetches only the rows and columns actually indexed.
+        :type lazy:         True or False; default = False
+
         Examples::
 
             # ...suppose we already have the Xepr object...
@@ -434,6 +709,56 @@ class Xepr(object):
         # noinspection PyTypeChecker
         return Experiment(self, *p, **k)
 
+    def watch(self, target, callback=None, interval=0.1, loop=None):
+        """
+        Watches an experiment state or a parameter value for changes. All watches of a connection are served by a single background
+        thread, and watches of the same experiment state or parameter share their reads: the state or value is read only once per
+        poll, at the shortest interval requested by any of its watches.
+
+        :param target:      :class:`~Experiment` to watch the state of (see *aqGetExpState*), or scalar :class:`~Parameter` to
+                            watch the value of.
+        :param callback:    Function called as *callback(newvalue, oldvalue)* whenever the state or value changes. Callbacks run in
+                            the watcher thread unless *loop* is given, so they should return quickly.
+        :type callback:     callable or None; default = None
+        :param interval:    Polling interval in seconds.
+        :type interval:     float; default = 0.1
+        :param loop:        If given, *callback* is scheduled in this asyncio event loop instead. Without a callback, the
+                            *event* attribute of the returned :class:`~Watch` is an :class:`asyncio.Event` that is set in *loop*
+                            upon each change.
+        :type loop:         :class:`asyncio.AbstractEventLoop` or None; default = None
+        :returns:           :class:`~Watch` instance; call its *cancel()* method to stop watching.
+
+        Examples::
+
+            # ...suppose we already have the Xepr object and an Experiment object...
+            >>> def scandone(new, old):
+            ...     print("scan %u of %u finished" % (new, todo))
+            >>> todo = exp['NbScansToDo'].value
+            >>> w = xepr.watch(exp['NbScansDone'], scandone, interval=0.5)
+            >>> xepr.watch(exp, lambda new, old: print("state changed to %u" % new))
+            >>> w.cancel()
+
+            # in a coroutine
+            >>> w = xepr.watch(exp, loop=asyncio.get_running_loop())
+            >>> await w.event.wait()
+        """
+        if interval <= 0:
+            raise ValueError('%sinterval must be positive' % _msgprefix)
+        if callback is None and loop is None:
+            raise ValueError('%seither a callback or an event loop is required' % _msgprefix)
+        if isinstance(target, Experiment):
+            key, read = (target.aqGetExpName(),), target.aqGetExpState
+        elif isinstance(target, Parameter):
+            if target._dim != 0:
+                raise ParameterError("%sonly scalar parameters can be watched, '%s' has %u dimensions" % (_msgprefix, target._name, target._dim))
+            # the qualified name identifies the parameter, the enum type how its value is returned
+            key, read = (target._parent.aqGetExpName(), target._name, getattr(target, '_enum', None)), lambda: target.value
+        else:
+            raise TypeError('%scan only watch Experiment or Parameter objects' % _msgprefix)
+        watch = Watch(self._watcher, target, key, callback, interval, loop)
+        self._watcher.add(key, read, watch)
+        return watch
+
     def XeprClose(self):
         """
         Closes the API and tells **Xepr** to shut down its API support as well. After that, the API support of **Xepr** has to be re-
@@ -444,10 +769,12 @@ class Xepr(object):
         """
 
         with self._lock:
-            for func in self._dynamicmethods:
-                delattr(self, func)
+            for func in list(self._dynamicmethods):
+                self.__dict__.pop(func, None)
 
-            self._dynamicmethods = []
+            self._dynamicmethods = set()
+            self._functable = dict()
+            self._watcher.clear()
             self._printmsg('Closing API...', newline=False)
             if self._API.XeprDisableAPI(1) == SUCCESS:
                 self._printmsg('done.', prefix='')
@@ -457,67 +784,174 @@ class Xepr(object):
                 raise IOError('%sCould not close API' % _msgprefix)
 
     def _popvalue(self):
-        dtype_ord = ctypes.c_int()
-        data = ctypes.create_string_buffer(255)
-        self._API.XeprPopValue(byref(dtype_ord), data)
-        dtype = STACK_TYPES[dtype_ord.value]
-        if dtype != pointer:
-            return dtype.from_buffer_copy(data).value
-        else:
-            return dtype.from_buffer_copy(data)
+        self._API.XeprPopValue(byref(self._popdtype), self._popbuf)
+        return _POPPERS[self._popdtype.value](self._popbuf)
 
     def _pushvalue(self, val):
-        if isinstance(val, pointer):
-            dtype = pointer
-        elif isinstance(val, Xepr.Xeprbuf):
-            dtype = Xepr.Xeprbuf
-        elif isinstance(val, bool):
-            dtype = ctypes.c_bool
-        elif isinstance(val, tuple(INT_TYPES)):
-            dtype = ctypes.c_int
-        elif isinstance(val, tuple(FLOAT_TYPES)):
-            dtype = ctypes.c_double
-        elif isinstance(val, char):
-            dtype = char
-        elif type(val) == str:
-            dtype = str
+        try:
+            stacktype, packer, convert = _PUSHERS[type(val)]
+        except KeyError:
+            stacktype, packer, convert = _pusherfortype(type(val))
+
+        if packer is not None:
+            packer.pack_into(self._pushbuf, 0, convert(val))
+            result = self._API.XeprPushValue(stacktype, self._pushbuf, packer.size)
         else:
-            dtype = None
+            data, size = convert(val)
+            result = self._API.XeprPushValue(stacktype, data, size)
+        if result < 0:
+            raise IOError('%sunable to pass argument of type %s to Xepr (at most %u bytes per argument)' % (_msgprefix, type(val).__name__, _MAXPUSHBYTES))
 
-        try:
-            stacktype = STACK_TYPES.index(dtype)
-        except Exception:
-            stacktype = [i for i, x in enumerate(STACK_TYPES) if x == dtype][0]
+    def startDispatcher(self, chunkbytes=DISPATCHERCHUNKBYTES):
+        """
+        Hands the connection over to a dispatcher thread. From then on, calls to **Xepr** from any thread are queued and executed
+        by the dispatcher thread, control calls (*aqExpAbort*, *aqExpStop*, *aqExpPause*, *aqGetExpState*) first and bulk data
+        transfers last. Dataset transfers are split into chunks of at most *chunkbytes* bytes, so that e.g. aborting an experiment
+        only has to wait for the current chunk, not for the whole transfer.
 
-        if isinstance(val, str):
-            data = val.encode(_encoding) + b'\x00'
-        elif isinstance(val, Xepr.Xeprbuf):
-            data = val.getstr(raw=True)
+        :param chunkbytes:  Maximum size of a single bulk data transfer in bytes.
+        :type chunkbytes:   int; default = :data:`DISPATCHERCHUNKBYTES`
+        """
+        if self._dispatcher is None:
+            self._dispatcher = _Dispatcher(chunkbytes)
         else:
-            data = ctypes.string_at(ctypes.addressof(dtype(val)), size=ctypes.sizeof(dtype))
+            self._dispatcher.chunkbytes = chunkbytes
+
+    def stopDispatcher(self):
+        """
+        Executes the calls still queued and stops the dispatcher thread started by :meth:`startDispatcher`. Afterwards, calls are
+        executed by the calling threads again.
+        """
+        dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            dispatcher.stop(wait=not dispatcher.owns())
 
-        self._API.XeprPushValue(stacktype, data, len(data))
+    def dispatcherStatistics(self):
+        """
+        :returns:   :class:`DispatcherStatistics` of the dispatcher thread, or *None* if there is no dispatcher thread.
+        """
+        return None if self._dispatcher is None else self._dispatcher.statistics()
 
-    def _callXeprfunc(self, funcidx, returnavalue, *p):
+    def submit(self, fkt, *p, **k):
+        """
+        Queues a call of a ProDeL function with the dispatcher thread without waiting for it (see :meth:`startDispatcher`). Without
+        a dispatcher thread, the call is executed right away.
+
+        :param fkt:         Name of the ProDeL function.
+        :type fkt:          string
+        :param p:           Arguments for the function.
+        :param priority:    Priority of the call, e.g. :data:`PRIORITY_CONTROL`; calls with lower values are executed first. By
+                            default, calls are prioritized as described for :meth:`startDispatcher`.
+        :type priority:     int or None; default = None
+        :returns:           :class:`concurrent.futures.Future` for the result of the call.
+
+        Example::
+
+            # ...suppose we already have the Xepr object and an Experiment object...
+            >>> Xepr.startDispatcher()
+            >>> transfer = threading.Thread(target=lambda: Xepr.XeprDataset().O)  # retrieve a large dataset meanwhile
+            >>> transfer.start()
+            >>> Xepr.submit("aqExpAbort", exp.getExp()).result()  # executed before the next chunk of the transfer
+        """
+        priority = k.pop('priority', None)
+        if k:
+            raise TypeError("%sunexpected keyword argument '%s'" % (_msgprefix, next(iter(k))))
+        functable = self.__dict__.get('_functable', {})
+        if fkt not in functable and '_%s_' % fkt not in functable:
+            raise AttributeError("%sno such ProDeL function '%s'" % (_msgprefix, fkt))
+        if priority is None:
+            priority = self._priorities.get(functable.get(fkt, functable.get('_%s_' % fkt))[0], PRIORITY_NORMAL)
+        fkt = getattr(self, fkt)
+        dispatcher = self._dispatcher
+        if dispatcher is not None and not dispatcher.owns():
+            return dispatcher.submit(priority, fkt, *p)
+        future = Future()
+        try:
+            future.set_result(fkt(*p))
+        except Exception as e:
+            future.set_exception(e)
+        return future
 
-        with self._lock:
-            listofbuffers = []
-            for arg in p:
-                self._pushvalue(arg)
-                if isinstance(arg, Xepr.Xeprbuf):
-                    listofbuffers.append(arg.buffer)
+    def batch(self):
+        """
+        Returns a context manager that queues the ProDeL calls without return value made by the current thread, e.g. for setting
+        parameters, and executes them at the end of the *with* block in one go, locking the connection only once. A call with a
+        return value or with an :class:`Xepr.Xeprbuf` argument (which **Xepr** writes to) executes the calls queued so far and
+        then itself. Calls returning a value can be queued explicitly with :meth:`Batch.submit`. Values of arrays passed to
+        queued calls are read when the calls are executed.
+
+        :returns:   :class:`~Batch` instance.
+        :raises:    :class:`BatchError` at the end of the *with* block if a queued call failed; the calls queued after the failing
+                    one are not executed.
+
+        Example::
+
+            # ...suppose we already have the Xepr object and an Experiment object...
+            >>> with Xepr.batch() as batch:
+            ...     exp['CenterField'].value = 3400.0
+            ...     exp['SweepWidth'].value = 100.0
+            ...     temperature = batch.submit('aqGetRealParValue', exp.getExp(), 'Temperature', 0, Xepr.NIL)
+            >>> print(temperature.result())
+        """
+        return Batch(self)
+
+    def _callXeprfunc(self, funcidx, returnavalue, *p):
+        batch = self._batches.get(get_ident()) if self._batches else None
+        if batch is not None:
+            if not returnavalue and not any(isinstance(arg, Xepr.Xeprbuf) for arg in p):
+                batch._queue(funcidx, returnavalue, p)
+                return
+            batch.flush()  # the caller needs the result right away
+        dispatcher = self._dispatcher
+        if dispatcher is not None and not dispatcher.owns():
+            priority = self._priorities.get(funcidx, PRIORITY_NORMAL)
+            return dispatcher.submit(priority, self._execXeprfunc, funcidx, returnavalue, *p).result()
+        return self._execXeprfunc(funcidx, returnavalue, *p)
 
-            if self._API.XeprCallFunction(funcidx) != 0:
-                raise ValueError('%sError processing function call' % _msgprefix)
+    def _execXeprfunc(self, funcidx, returnavalue, *p):
 
-            for buf in reversed(listofbuffers):
-                buf_len = len(buf.tostring())
-                tmpbuf = ctypes.create_string_buffer(buf_len)
-                self._API.XeprGetMutable(byref(tmpbuf), buf_len)
-                buf[:] = np.frombuffer(tmpbuf.raw, dtype=buf.dtype)
+        with self._lock:
+            while self._orphaneddsets:
+                self.destroyDset(self._orphaneddsets.pop())
+            return self._invokeXeprfunc(funcidx, returnavalue, p)
 
-            if returnavalue:
-                return self._popvalue()
+    def _execbatch(self, calls):
+        with self._lock:
+            while self._orphaneddsets:
+                self.destroyDset(self._orphaneddsets.pop())
+            for n, (funcidx, returnavalue, p, future) in enumerate(calls):
+                try:
+                    result = self._invokeXeprfunc(funcidx, returnavalue, p)
+                except Exception as e:
+                    error = BatchError(self._listoffunctions[funcidx], p, n, len(calls), e)
+                    future.set_exception(error)
+                    for _, _, _, pending in calls[n + 1:]:
+                        pending.cancel()
+                    raise error
+                future.set_result(result)
+
+    def _invokeXeprfunc(self, funcidx, returnavalue, p):
+        # the caller holds the lock
+        listofbuffers = []
+        for arg in p:
+            self._pushvalue(arg)
+            if isinstance(arg, Xepr.Xeprbuf):
+                listofbuffers.append(arg.buffer)
+            elif isinstance(arg, np.ndarray):
+                # arrays are pushed as buffers and Xepr sends them back like any other buffer; they are input only, so the
+                # reply goes to a scratch buffer (with a spare byte like an Xeprbuf)
+                listofbuffers.append(np.empty(shape=arg.nbytes + 1, dtype=np.byte))
+
+        if self._API.XeprCallFunction(funcidx) != 0:
+            raise ValueError('%sError processing function call' % _msgprefix)
+
+        # Xepr writes directly into the memory of the numpy buffer; libxeprapi terminates the received data with a NUL
+        # byte, which has to land in the spare trailing element every Xeprbuf reserves
+        for buf in reversed(listofbuffers):
+            self._API.XeprGetMutable(buf.ctypes.data_as(ctypes.c_void_p), buf.nbytes - buf.itemsize)
+
+        if returnavalue:
+            return self._popvalue()
 
     def XeprGUIrefresh(self):
         """
@@ -526,23 +960,6 @@ class Xepr(object):
         with self._lock:
             self._API.XeprRefreshGUI()
 
-    def _getprodelprototypes(self, *path):
-        directory = os.path.join(*path)
-        if not os.path.isdir(directory):
-            return dict()
-        docdict = dict()
-        fnames = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.doc')]
-        pattern = re.compile('(\\w*\\s*(\\w+)[\\t]*\\([\\w\\s,]*\\))')
-        for fname in fnames:
-            f = open(fname)
-            content = f.read()
-            f.close()
-            matches = re.findall(pattern, content)
-            for docstr, funcname in matches:
-                docdict[funcname] = docstr
-
-        return docdict
-
     class Xeprbuf:
 
         def __init__(self, preset=b'', length=None, dtype=np.byte):
@@ -587,7 +1004,27 @@ class Xepr(object):
             return len(self.buffer.tostring())
 
     class _cmds:
-        pass
+
+        _commands = dict()
+
+        def __init__(self, execCmd, commandnames):
+            self._execCmd = execCmd
+            self._commandnames = frozenset(commandnames)
+
+        def __getattr__(self, name):
+            if name not in self.__dict__.get('_commandnames', ()):
+                raise AttributeError("no such Xepr command '%s'" % name)
+            if name not in self._commands:
+                def command(self, *p):
+                    return self._execCmd(name, *p)
+                command.__name__ = command.__qualname__ = name
+                self._commands[name] = command
+            method = types.MethodType(self._commands[name], self)
+            setattr(self, name, method)
+            return method
+
+        def __dir__(self):
+            return sorted(set(object.__dir__(self)) | self._commandnames)
 
 
 STACK_TYPES = (
@@ -600,6 +1037,255 @@ try:
     FLOAT_TYPES = frozenset((float, np.double, np.float32, np.float64, np.float128))
 except AttributeError:
     FLOAT_TYPES = frozenset((float, np.double, np.float32, np.float64))
+ARRAY_TYPES = frozenset(np.dtype(t) for t in (np.double, np.int32, np.int8))
+
+
+def _pushstr(val):
+    data = val.encode(_encoding) + b'\x00'
+    return data, len(data)
+
+
+def _pushbytes(val):
+    data = val + b'\x00'
+    return data, len(data)
+
+
+def _pushxeprbuf(val):
+    return val.buffer.ctypes.data_as(ctypes.c_void_p), val.buffer.nbytes
+
+
+def _pusharray(val):
+    # numpy arrays are pushed as data blocks straight from their memory
+    if val.dtype not in ARRAY_TYPES:
+        raise TypeError('%scannot pass numpy array of type %s to Xepr' % (_msgprefix, val.dtype))
+    val = np.ascontiguousarray(val)
+    return val.ctypes.data_as(ctypes.c_void_p), val.nbytes
+
+
+# Python type -> (stack type, struct used to pack the value or None, conversion of the value); for a struct of None, the
+# conversion returns the data to be pushed and its size
+_INT32 = struct.Struct('I')  # ints are truncated to 32 bits like ctypes.c_int does
+_PUSHERS = {
+    pointer: (STACK_TYPES.index(pointer), _INT32, lambda val: val.value & 0xFFFFFFFF),
+    bool: (STACK_TYPES.index(ctypes.c_bool), struct.Struct('?'), bool),
+    char: (STACK_TYPES.index(char), struct.Struct('c'), lambda val: val.value),
+    str: (STACK_TYPES.index(str), None, _pushstr),
+    bytes: (STACK_TYPES.index(str), None, _pushbytes),
+    Xepr.Xeprbuf: (STACK_TYPES.index(Xepr.Xeprbuf), None, _pushxeprbuf),
+    np.ndarray: (STACK_TYPES.index(Xepr.Xeprbuf), None, _pusharray),
+}
+_PUSHERS.update((t, (STACK_TYPES.index(ctypes.c_int), _INT32, lambda val: int(val) & 0xFFFFFFFF)) for t in INT_TYPES)
+_PUSHERS.update((t, (STACK_TYPES.index(ctypes.c_double), struct.Struct('d'), float)) for t in FLOAT_TYPES)
+
+
+def _pusherfortype(dtype):
+    """
+    Looks up the dispatch table entry for a subclass of one of the types in the table and adds it to the table.
+    """
+    for basetype in (pointer, Xepr.Xeprbuf, np.ndarray, bool, int, np.integer, float, np.floating, char, str, bytes):
+        if issubclass(dtype, basetype):
+            pusher = _PUSHERS[basetype] if basetype in _PUSHERS else _PUSHERS[int if basetype is np.integer else float]
+            _PUSHERS[dtype] = pusher
+            return pusher
+    raise TypeError('%scannot pass value of type %s to Xepr' % (_msgprefix, dtype.__name__))
+
+
+def _popper(dtype):
+    if dtype == pointer:
+        return pointer.from_buffer_copy
+    if dtype in (str, Xepr.Xeprbuf) or not isinstance(dtype, type):
+        return lambda data: None
+    return lambda data: dtype.from_buffer(data).value
+
+
+# stack type -> function returning the value popped into a buffer
+_POPPERS = tuple(_popper(dtype) for dtype in STACK_TYPES)
+
+
+# runs of changed values separated by fewer bytes than this are written upstream in one block
+_DIRTYGAPBYTES = 4096
+
+
+def _changed(values, oldvalues):
+    changed = values != oldvalues
+    if np.issubdtype(values.dtype, np.inexact):
+        changed &= ~(np.isnan(values) & np.isnan(oldvalues))
+    return changed
+
+
+def _dirtyruns(changed, maxgap=0):
+    """
+    Returns the list of (start, stop) index ranges of the runs of *True* values in the boolean array *changed*, merging runs
+    that are separated by no more than *maxgap* unchanged values.
+    """
+    idx = np.flatnonzero(changed)
+    if not idx.size:
+        return []
+    breaks = np.flatnonzero(np.diff(idx) > maxgap + 1)
+    starts = np.concatenate(((idx[0],), idx[breaks + 1]))
+    stops = np.concatenate((idx[breaks] + 1, (idx[-1] + 1,)))
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def _implicitmethod(fkt, handle):
+    """
+    Returns a method calling the ProDeL function *fkt* of the object's parent, with the value returned by *handle* (called with
+    the object) as the first argument.
+    """
+    def method(self, *p):
+        return getattr(self._parent, fkt)(handle(self), *p)
+    method.__name__ = method.__qualname__ = fkt
+    return method
+
+
+# statistics of a wait with Experiment.waitFor or Experiment.waitUntil: number of polls, total time waited, mean and maximum
+# duration of a single poll and the longest interval between two polls (all in seconds)
+WaitStatistics = namedtuple('WaitStatistics', 'polls elapsed meanpolltime maxpolltime maxinterval')
+
+
+# a scan captured by Experiment.captureScans: number of the scan, its ordinate and the time taken (in seconds) for pausing the
+# experiment after the scan, for Xepr to update the number of scans done, for transferring the data, as well as the total time
+# the experiment was held paused
+ScanCapture = namedtuple('ScanCapture', 'scan ordinate pausetime synctime transfertime heldtime')
+
+
+# statistics of the dispatcher thread of a connection: number of calls executed, number of calls currently queued and the
+# maximum number so far, mean and maximum time (in seconds) calls waited in the queue
+DispatcherStatistics = namedtuple('DispatcherStatistics', 'calls queued maxqueued meanwait maxwait')
+
+
+class _Dispatcher(object):
+    # executes all calls of a connection in a single thread, in the order of their priority and, within the same priority, in
+    # the order they were submitted
+
+    def __init__(self, chunkbytes):
+        self.chunkbytes = chunkbytes
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._calls = 0
+        self._maxqueued = 0
+        self._totalwait = 0.0
+        self._maxwait = 0.0
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def owns(self):
+        return get_ident() == self._thread.ident
+
+    def submit(self, priority, fkt, *p):
+        future = Future()
+        self._queue.put((priority, next(self._seq), time.monotonic(), future, fkt, p))
+        self._maxqueued = max(self._maxqueued, self._queue.qsize())
+        return future
+
+    def stop(self, wait=True):
+        self._queue.put((float('inf'), next(self._seq), time.monotonic(), None, None, None))
+        if wait:
+            self._thread.join()
+
+    def statistics(self):
+        return DispatcherStatistics(self._calls, self._queue.qsize(), self._maxqueued,
+                                    self._totalwait / self._calls if self._calls else 0.0, self._maxwait)
+
+    def _run(self):
+        while True:
+            priority, seq, queued, future, fkt, p = self._queue.get()
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            wait = time.monotonic() - queued
+            self._calls += 1
+            self._totalwait += wait
+            self._maxwait = max(self._maxwait, wait)
+            try:
+                future.set_result(fkt(*p))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class Batch(object):
+    """
+    Context manager queuing ProDeL calls, as returned by :meth:`Xepr.batch`. Batches of the same thread may be nested; the calls
+    are then executed at the end of the outermost batch.
+    """
+
+    def __init__(self, xepr):
+        self._xepr = xepr
+        self._calls = []
+        self._outer = None
+
+    def submit(self, fkt, *p):
+        """
+        Queues a call of the ProDeL function *fkt* with the arguments *p*.
+
+        :returns:   :class:`concurrent.futures.Future` for the result of the call, available after the batch was executed.
+        """
+        functable = self._xepr.__dict__.get('_functable', {})
+        entry = functable.get(fkt, functable.get('_%s_' % fkt))
+        if entry is None:
+            raise AttributeError("%sno such ProDeL function '%s'" % (_msgprefix, fkt))
+        idx, args, rets = entry
+        if args < 0:
+            p += (len(p),)
+        elif len(p) != args:
+            raise TypeError('%s() takes %u arguments (%u given)' % (fkt, args, len(p)))
+        target = self._outer if self._outer is not None else self
+        return target._queue(idx, rets, p)
+
+    def flush(self):
+        """
+        Executes the calls queued so far.
+
+        :raises:    :class:`BatchError` if a call failed.
+        """
+        if self._outer is not None:
+            return self._outer.flush()
+        calls, self._calls = self._calls, []
+        if not calls:
+            return
+        xepr, thread = self._xepr, get_ident()
+        # while executing, calls (e.g. destroying orphaned datasets) must not end up in the batch
+        registered = xepr._batches.pop(thread, None)
+        try:
+            dispatcher = xepr._dispatcher
+            if dispatcher is not None and not dispatcher.owns():
+                dispatcher.submit(PRIORITY_NORMAL, xepr._execbatch, calls).result()
+            else:
+                xepr._execbatch(calls)
+        finally:
+            if registered is not None:
+                xepr._batches[thread] = registered
+
+    def _queue(self, funcidx, returnavalue, p):
+        future = Future()
+        self._calls.append((funcidx, returnavalue, p, future))
+        return future
+
+    def _onsuccess(self, fn):
+        # calls fn() once the call queued last has been executed successfully
+        def done(future):
+            if not future.cancelled() and future.exception() is None:
+                fn()
+        self._calls[-1][-1].add_done_callback(done)
+
+    def __enter__(self):
+        self._outer = self._xepr._batches.get(get_ident())
+        if self._outer is None:
+            self._xepr._batches[get_ident()] = self
+        return self
+
+    def __exit__(self, exctype, exc, tb):
+        if self._outer is not None:
+            self._outer = None
+            return
+        del self._xepr._batches[get_ident()]
+        if exctype is None:
+            self.flush()
+        else:
+            calls, self._calls = self._calls, []
+            for call in calls:
+                call[-1].cancel()
 
 
 class DatasetError(Exception):
@@ -624,6 +1310,21 @@ class ExperimentError(Exception):
     pass
 
 
+class BatchError(ValueError):
+    """
+    Raised when a call queued in a :class:`~Batch` fails. The attributes *call*, *callargs* and *index* give the name of the ProDeL
+    function, its arguments and the position of the call in the batch; *error* is the original exception.
+    """
+
+    def __init__(self, call, args, index, count, error):
+        ValueError.__init__(self, '%scall %u of %u in batch failed: %s(%s): %s' % (
+            _msgprefix, index + 1, count, call, ', '.join(repr(arg) for arg in args), str(error).replace(_msgprefix, '', 1)))
+        self.call = call
+        self.callargs = args
+        self.index = index
+        self.error = error
+
+
 class ParameterError(Exception):
     """
     Raised when a parameter is not available in an experiment or the type of parameter
@@ -666,14 +1367,24 @@ class Dataset(object):
         'setValue',
     ]
     _toberenamed = 'isComplex'
+    blocktransferbytes = BLOCKTRANSFERBYTES
 
-    def __init__(self, parent, size=None, autorefresh=False, xeprset='primary', iscomplex=False, shape=None):
+    @property
+    def _transferbytes(self):
+        dispatcher = self._parent._dispatcher
+        transferbytes = min(self.blocktransferbytes, _MAXPUSHBYTES)
+        return transferbytes if dispatcher is None else min(transferbytes, dispatcher.chunkbytes)
+
+    def __init__(self, parent, size=None, autorefresh=False, xeprset='primary', iscomplex=False, shape=None, bulktransfer=True, lazy=False):
         self._parent = parent
         self.autorefresh = autorefresh
+        self.bulktransfer = bulktransfer
+        self.lazy = lazy
         self.setXeprSet(xeprset)
         self._dset = self._parent.NIL
         self._upstream = False
         self._arrays = dict()
+        self._pristine = dict()
         self._modified = set()
 
         if size and shape:
@@ -700,10 +1411,6 @@ class Dataset(object):
             self.size = self.shape[::-1]
             self.isComplex = self.iscomplex = iscomplex
 
-        if not hasattr(self, self._implicitdset[0]):
-            for fkt in self._implicitdset:
-                setattr(self, fkt if not hasattr(self, fkt) and fkt not in self._toberenamed else '_%s_' % fkt, types.MethodType(eval('lambda self,*p : self._parent.%s(self.getDset(), *p)' % fkt), self))
-
     def datasetAvailable(self):
         """
         Check whether dataset is available.
@@ -731,6 +1438,7 @@ class Dataset(object):
                 raise DatasetError('%scould not retrieve dataset from Xepr' % _msgprefix)
 
             self._arrays = dict()
+            self._pristine = dict()
             self._modified = set()
             self.isComplex = self.iscomplex = self._parent.isComplex(self._dset)
             getNrOfPoints = self._parent.getNrOfPoints
@@ -744,24 +1452,127 @@ class Dataset(object):
             self.size = self.shape[::-1]
         return self._dset
 
+    def _blocks(self, xN, yN):
+        # splits yN rows of xN values into blocks of whole rows that fit into the transfer budget, or into pieces of single rows
+        # if a row does not fit; yields (column, columns, row, rows) of each block
+        valuesperblock = max(1, self._transferbytes // ctypes.sizeof(ctypes.c_double))
+        cols = max(1, min(xN, valuesperblock))
+        rows = max(1, min(yN, valuesperblock // cols))
+        for y in range(0, yN, rows):
+            for x in range(0, xN, cols):
+                yield x, min(cols, xN - x), y, min(rows, yN - y)
+
     def getN2DValues(self, xIdx, xN, yIdx, yN, ordtype):
+        """
+        Read a block of *yN* rows of *xN* ordinate values each from a 2D dataset, starting at row *yIdx* and column *xIdx*.
+        Several rows are requested from **Xepr** per call, as many as fit into :attr:`blocktransferbytes` (which is capped at
+        the libxeprapi limit of 320 KiB per call); rows that do not fit are requested in pieces.
+
+        :returns:   2D (*Numpy*) array of double values with shape (*yN*, *xN*).
+        """
         dset = self.getDset()
-        size = xN * ctypes.sizeof(ctypes.c_double)
-        buf = self._parent.Xeprbuf(size)
         data = np.empty(shape=(yN, xN), dtype=np.double)
-        for y in range(yN):
-            self._parent.getN2DValues(dset, 0, xN, y, 1, ordtype, buf)
-            data[y][:] = np.frombuffer(buf.getstr(raw=True)[:size], dtype=np.double)[:]
+        buf = None
+        for x, cols, y, rows in self._blocks(xN, yN):
+            if buf is None:  # the first block is the largest one
+                buf = self._parent.Xeprbuf(rows * cols * ctypes.sizeof(ctypes.c_double))
+            self._parent.getN2DValues(dset, xIdx + x, cols, yIdx + y, rows, ordtype, buf)
+            data[y:y + rows, x:x + cols] = buf.buffer[:rows * cols * ctypes.sizeof(ctypes.c_double)].view(np.double).reshape(rows, cols)
 
         return data
 
+    def setN2DValues(self, xIdx, xN, yIdx, yN, ordtype, values):
+        """
+        Write a block of *yN* rows of *xN* ordinate values each to a 2D dataset, starting at row *yIdx* and column *xIdx*.
+        Several rows are sent to **Xepr** per call, as many as fit into :attr:`blocktransferbytes` (which is capped at the
+        libxeprapi limit of 320 KiB per call); rows that do not fit are sent in pieces.
+
+        :param values:  2D array-like of real values with shape (*yN*, *xN*).
+        """
+        dset = self.getDset()
+        values = np.ascontiguousarray(values, dtype=np.double).reshape(yN, xN)
+        for x, cols, y, rows in self._blocks(xN, yN):
+            self._parent.setN2DValues(dset, xIdx + x, cols, yIdx + y, rows, ordtype, values[y:y + rows, x:x + cols])
+
+    def getNValues(self, idx, n, valtype):
+        """
+        Read *n* consecutive values of an ordinate (1D datasets) or abscissa, starting at index *idx*, in block transfers of at
+        most :attr:`blocktransferbytes` bytes each.
+
+        :param idx:         Index of the first value to be read.
+        :param n:           Number of values to be read.
+        :param valtype:     Type of values to be read, i.e. *REAL_ORD*, *IMAG_ORD*, *X_ABSC* or *Y_ABSC*.
+        :returns:           1D (*Numpy*) array of *n* double values.
+        """
+        dset = self.getDset()
+        data = np.empty(shape=n, dtype=np.double)
+        if ('getN2DValues', valtype) in self._parent._nobulktransfer:
+            for i in range(n):
+                data[i] = self.getValue(idx + i, valtype)
+            return data
+
+        alongY = valtype == self._parent.Y_ABSC
+        doublesize = ctypes.sizeof(ctypes.c_double)
+        blocklen = max(1, min(n, self._transferbytes // doublesize))
+        buf = self._parent.Xeprbuf(blocklen * doublesize)
+        for start in range(0, n, blocklen):
+            count = min(blocklen, n - start)
+            try:
+                if alongY:
+                    self._parent.getN2DValues(dset, 0, 1, idx + start, count, valtype, buf)
+                else:
+                    self._parent.getN2DValues(dset, idx + start, count, 0, 1, valtype, buf)
+            except ValueError:
+                # Xepr does not support block transfers for this kind of values, fall back to single values from now on
+                self._parent._nobulktransfer.add(('getN2DValues', valtype))
+                data[start:] = self.getNValues(idx + start, n - start, valtype)
+                break
+            data[start:start + count] = buf.buffer[:count * doublesize].view(np.double)
+
+        return data
+
+    def setNValues(self, idx, values, valtype):
+        """
+        Write the values in *values* to an ordinate (1D datasets) or abscissa, starting at index *idx*, in block transfers of at
+        most :attr:`blocktransferbytes` bytes each.
+
+        :param idx:         Index of the first value to be written.
+        :param values:      1D sequence of real values.
+        :param valtype:     Type of values to be written, i.e. *REAL_ORD*, *IMAG_ORD*, *X_ABSC* or *Y_ABSC*.
+        """
+        dset = self.getDset()
+        values = np.ascontiguousarray(values, dtype=np.double)
+        n = values.size
+        if ('setN2DValues', valtype) in self._parent._nobulktransfer:
+            for i, val in enumerate(values):
+                self.setValue(idx + i, valtype, float(val))
+            return
+
+        alongY = valtype == self._parent.Y_ABSC
+        blocklen = max(1, min(n, self._transferbytes // ctypes.sizeof(ctypes.c_double)))
+        for start in range(0, n, blocklen):
+            count = min(blocklen, n - start)
+            block = values[start:start + count]
+            try:
+                if alongY:
+                    self._parent.setN2DValues(dset, 0, 1, idx + start, count, valtype, block)
+                else:
+                    self._parent.setN2DValues(dset, idx + start, count, 0, 1, valtype, block)
+            except ValueError:
+                # Xepr does not support block transfers for this kind of values, fall back to single values from now on
+                self._parent._nobulktransfer.add(('setN2DValues', valtype))
+                self.setNValues(idx + start, values[start:], valtype)
+                break
+
     def __del__(self):
         try:
             if self._dset != self._parent.NIL:
-                self._parent.destroyDset(self._dset)
+                # finalizers may run in the middle of another call's argument marshalling, so let that call destroy the dataset
+                self._parent._orphaneddsets.append(self._dset)
                 self._dset = self._parent.NIL
                 self._upstream = False
                 self._arrays = dict()
+                self._pristine = dict()
                 self._modified = set()
                 delattr(self, 'shape')
                 delattr(self, 'isComplex')
@@ -771,38 +1582,56 @@ class Dataset(object):
 
     def _updateupstream(self):
         is2D = len(self.shape) == 2
-        x, y = self.shape[-1], self.shape[0] if is2D else None
-        iscomplex = self.isComplex
-        for modified in self._modified:
-            if modified in self._arrays:
-                if modified == 'X':
-                    for i, val in enumerate(self._arrays['X']):
-                        self.setValue(i, self._parent.X_ABSC, val)
-
-                if modified == 'Y':
-                    for i, val in enumerate(self._arrays['Y']):
-                        self.setValue(i, self._parent.Y_ABSC, val)
-
-                if modified == 'O':
-                    if is2D:
-                        dsetP = self.getDset()
-                        valarr_real = self._arrays['O'].real.astype(np.double)
-                        for j in range(y):
-                            self._parent.setN2DValues(dsetP, 0, x, j, 1, self._parent.REAL_ORD, valarr_real[j].tostring())
-
-                        if iscomplex:
-                            valarr_imag = self._arrays['O'].imag.astype(np.double)
-                            for j in range(y):
-                                self._parent.setN2DValues(dsetP, 0, x, j, 1, self._parent.IMAG_ORD, valarr_imag[j].tostring())
+        for name in self._modified | set(self._pristine):
+            if name not in self._arrays:
+                continue
+            values, pristine = self._arrays[name], self._pristine.get(name)
+            if pristine is not None and pristine.shape != values.shape:
+                pristine = None
+            if name == 'O':
+                parts = [(self._parent.REAL_ORD, values.real, None if pristine is None else pristine.real)]
+                if self.isComplex:
+                    parts.append((self._parent.IMAG_ORD, values.imag, None if pristine is None else pristine.imag))
+            else:
+                parts = [(self._parent.X_ABSC if name == 'X' else self._parent.Y_ABSC, values, pristine)]
 
-                    else:
-                        for i, val in enumerate(self._arrays['O']):
-                            self.setValue(i, self._parent.REAL_ORD, val.real)
-                            if iscomplex:
-                                self.setValue(i, self._parent.IMAG_ORD, val.imag)
+            for valtype, vals, oldvals in parts:
+                if name == 'O' and is2D:
+                    self._writerows(valtype, vals, oldvals)
+                else:
+                    self._writevalues(valtype, vals, oldvals)
+            self._pristine[name] = np.array(values, copy=True)
 
+        self._modified = set()
         return
 
+    def _adoptordinate(self, lazyordinate, data):
+        if self._arrays.get('O') is lazyordinate:
+            self._arrays['O'] = data
+            self._pristine['O'] = data.copy()
+
+    def _writevalues(self, valtype, values, oldvalues):
+        if oldvalues is None:
+            runs = [(0, values.size)]
+        else:
+            runs = _dirtyruns(_changed(values, oldvalues), _DIRTYGAPBYTES // ctypes.sizeof(ctypes.c_double))
+        for start, stop in runs:
+            if self.bulktransfer:
+                self.setNValues(start, values[start:stop], valtype)
+            else:
+                for i in range(start, stop):
+                    self.setValue(i, valtype, float(values[i]))
+
+    def _writerows(self, valtype, values, oldvalues):
+        y, x = values.shape
+        if oldvalues is None:
+            runs = [(0, y)]
+        else:
+            rowbytes = x * ctypes.sizeof(ctypes.c_double)
+            runs = _dirtyruns(_changed(values, oldvalues).any(axis=1), _DIRTYGAPBYTES // rowbytes)
+        for start, stop in runs:
+            self.setN2DValues(0, x, start, stop - start, valtype, values[start:stop])
+
     def fromXepr(self, xeprset=None):
         """
         Update the dataset in the :class:`~Dataset` instance with data from **Xepr**.
@@ -912,6 +1741,9 @@ class Dataset(object):
                 raise DimensionError('%s1D dataset, does not have second abscissa' % _msgprefix)
 
             if name not in self._arrays:  # get value from Xepr and save in cache
+                if name == 'O' and self.lazy and len(self.shape) == 2:
+                    self._arrays[name] = LazyOrdinate(self)  # values are fetched upon indexing
+                    return self._arrays[name]
                 if name == 'O':
                     is2D = len(self.shape) == 2
                     x, y = self.shape[-1], self.shape[0] if is2D else None
@@ -921,6 +1753,10 @@ class Dataset(object):
                             val = np.empty(shape=(y, x), dtype=np.complex64)
                             val.real[:] = self.getN2DValues(0, x, 0, y, self._parent.REAL_ORD)[:]
                             val.imag[:] = self.getN2DValues(0, x, 0, y, self._parent.IMAG_ORD)[:]
+                        elif self.bulktransfer:
+                            val = np.empty(shape=x, dtype=np.complex64)
+                            val.real[:] = self.getNValues(0, x, self._parent.REAL_ORD)
+                            val.imag[:] = self.getNValues(0, x, self._parent.IMAG_ORD)
                         else:
                             it = (complex(self.getValue(i, self._parent.REAL_ORD), self.getValue(i, self._parent.IMAG_ORD)) for i in range(x))
                             val = np.fromiter(it, dtype=np.complex64)
@@ -928,6 +1764,8 @@ class Dataset(object):
                         if is2D:
                             val = np.empty(shape=(y, x), dtype=np.float64)
                             val[:] = self.getN2DValues(0, x, 0, y, self._parent.REAL_ORD)[:]
+                        elif self.bulktransfer:
+                            val = self.getNValues(0, x, self._parent.REAL_ORD)
                         else:
                             it = (self.getValue(i, self._parent.REAL_ORD) for i in range(x))
                             val = np.fromiter(it, dtype=np.float64)
@@ -936,10 +1774,13 @@ class Dataset(object):
                 elif name in ('X', 'Y'):
                     ax = self._parent.X_ABSC if name == 'X' else self._parent.Y_ABSC
                     imax = self.shape[-1] if name == 'X' else self.shape[0]
-                    it = (self.getValue(i, ax) for i in range(imax))
-                    val = np.fromiter(it, dtype=np.float64)
+                    if self.bulktransfer:
+                        val = self.getNValues(0, imax, ax)
+                    else:
+                        it = (self.getValue(i, ax) for i in range(imax))
+                        val = np.fromiter(it, dtype=np.float64)
                 self._arrays[name] = val
-                self._modified.add(name)
+                self._pristine[name] = val.copy()  # what Xepr holds, to find the values changed in place later on
 
             return self._arrays[name]  # return cached value
         elif name in ('shape', 'size', 'isComplex', 'iscomplex'):
@@ -972,7 +1813,229 @@ class Dataset(object):
             object.__setattr__(self, name, val)
 
 
+for _fkt in Dataset._implicitdset:
+    setattr(Dataset, _fkt if not hasattr(Dataset, _fkt) and _fkt not in Dataset._toberenamed else '_%s_' % _fkt, _implicitmethod(_fkt, Dataset.getDset))
+
+
+class LazyOrdinate(object):
+    """
+    Read-only proxy for the ordinate of a 2D :class:`~Dataset`, returned by :attr:`Dataset.O` if the dataset has been created with
+    *lazy* = *True*. Indexing the proxy like a *Numpy* array, e.g. ``dset.O[10:20, 500:900]``, fetches only the block of rows and
+    columns covered by the index from **Xepr**. Fetched values are cached. ``np.asarray(dset.O)`` fetches the remaining values and
+    returns the full ordinate array, which from then on is also returned by :attr:`Dataset.O`.
+    """
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+        self.shape = tuple(dataset.shape)
+        self.dtype = np.dtype(np.complex64 if dataset.isComplex else np.float64)
+        self._data = np.empty(shape=self.shape, dtype=self.dtype)
+        self._view = self._data.view()
+        self._view.flags.writeable = False
+        # fetched values of row y are self._data[y, self._lo[y]:self._hi[y]]
+        self._lo = np.zeros(self.shape[0], dtype=np.intp)
+        self._hi = np.zeros(self.shape[0], dtype=np.intp)
+
+    ndim = 2
+
+    @property
+    def size(self):
+        return self._data.size
+
+    @property
+    def complete(self):
+        """
+        *True* if all values of the ordinate have been fetched from **Xepr**.
+        """
+        return bool((self._lo == 0).all() and (self._hi == self.shape[1]).all())
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        for y in range(self.shape[0]):
+            yield self[y]
+
+    def __getitem__(self, key):
+        self._fetch(*self._bounds(key))
+        return self._view[key]
+
+    def __array__(self, dtype=None, copy=None):
+        self._fetch((0, self.shape[0]), (0, self.shape[1]))
+        if dtype is not None and np.dtype(dtype) != self.dtype:
+            return self._data.astype(dtype)
+        return self._data
+
+    def __repr__(self):
+        return '<%s(shape=%s, dtype=%s)>' % (self.__class__.__name__, self.shape, self.dtype)
+
+    def _bounds(self, key):
+        full = ((0, self.shape[0]), (0, self.shape[1]))
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2 or any(k is Ellipsis or k is None or np.ndim(k) > 1 for k in key):
+            return full
+        key = key + (slice(None),) * (2 - len(key))
+        return tuple(self._axisbounds(k, n) for k, n in zip(key, self.shape))
+
+    def _axisbounds(self, idx, n):
+        if isinstance(idx, slice):
+            r = range(*idx.indices(n))
+            if not len(r):
+                return 0, 0
+            return min(r[0], r[-1]), max(r[0], r[-1]) + 1
+        idx = np.asarray(idx)
+        if idx.dtype == bool:
+            idx = np.flatnonzero(idx)
+        if not idx.size:
+            return 0, 0
+        idx = np.where(idx < 0, idx + n, idx)
+        if idx.min() < 0 or idx.max() >= n:
+            raise IndexError('%sindex out of range for ordinate axis with %u values' % (_msgprefix, n))
+        return int(idx.min()), int(idx.max()) + 1
+
+    def _fetch(self, rows, cols):
+        (y0, y1), (x0, x1) = rows, cols
+        if y0 >= y1 or x0 >= x1:
+            return
+        lo, hi = self._lo[y0:y1], self._hi[y0:y1]
+        empty = lo >= hi
+        newlo = np.where(empty, x0, np.minimum(lo, x0))
+        newhi = np.where(empty, x1, np.maximum(hi, x1))
+        # per row, values are missing left and right of the fetched range (the whole new range if nothing was fetched yet)
+        for starts, stops in ((newlo, np.where(empty, newhi, lo)), (np.where(empty, newhi, hi), newhi)):
+            missing = starts < stops
+            if not missing.any():
+                continue
+            # rows with the same missing columns are fetched as one block
+            change = np.flatnonzero((starts[1:] != starts[:-1]) | (stops[1:] != stops[:-1]) | (missing[1:] != missing[:-1])) + 1
+            for a, b in zip(np.concatenate(((0,), change)), np.concatenate((change, (len(starts),)))):
+                if missing[a]:
+                    self._read(y0 + int(a), y0 + int(b), int(starts[a]), int(stops[a]))
+        self._lo[y0:y1], self._hi[y0:y1] = newlo, newhi
+        if self.complete:
+            self._dataset._adoptordinate(self, self._data)
+
+    def _read(self, y0, y1, x0, x1):
+        dset, xepr = self._dataset, self._dataset._parent
+        self._data.real[y0:y1, x0:x1] = dset.getN2DValues(x0, x1 - x0, y0, y1 - y0, xepr.REAL_ORD)
+        if self.dtype.kind == 'c':
+            self._data.imag[y0:y1, x0:x1] = dset.getN2DValues(x0, x1 - x0, y0, y1 - y0, xepr.IMAG_ORD)
+
+
+class _ScanWriter(object):
+    # saves captured scans in a background thread, so that writing to disk does not hold up the acquisition
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, filename, data):
+        if self._error is not None:
+            raise self._error
+        self._queue.put((filename, data))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is None:
+                try:
+                    np.save(*item)
+                except Exception as e:
+                    self._error = e
+
+
+def _samevalue(value, other):
+    if isinstance(value, np.ndarray) or isinstance(other, np.ndarray):
+        value, other = np.asarray(value), np.asarray(other)
+        return value.shape == other.shape and not _changed(value, other).any()
+    return value == other or (value != value and other != other)
+
+
+class Snapshot(object):
+    """
+    Values of experiment parameters at some point in time, as returned by :meth:`Experiment.snapshot`. Values are accessed by the
+    qualified parameter name, e.g. *snapshot['cwBridge.PowerAtten']*; values of multi-dimensional parameters are *Numpy* arrays.
+
+    .. attribute:: experiment
+
+        Name of the experiment the snapshot was taken of.
+
+    .. attribute:: time
+
+        Time the snapshot was taken (see :func:`time.time`).
+
+    .. attribute:: values
+
+        Dictionary mapping qualified parameter names to their values.
+    """
+
+    def __init__(self, experiment, values, time=None):
+        self.experiment = experiment
+        self.values = values
+        self.time = time
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def diff(self, other):
+        """
+        Compares the snapshot with another one.
+
+        :param other:   Snapshot to compare with.
+        :type other:    :class:`~Snapshot`
+        :returns:       Dictionary mapping the names of the parameters whose values differ to tuples (*value*, *other value*);
+                        the value is *None* for parameters missing in one of the snapshots.
+        """
+        changed = dict()
+        for name in list(self.values) + [name for name in other.values if name not in self.values]:
+            value, othervalue = self.values.get(name), other.values.get(name)
+            if value is None or othervalue is None or not _samevalue(value, othervalue):
+                changed[name] = (value, othervalue)
+        return changed
+
+    def toDict(self):
+        """
+        :returns:   Dictionary representing the snapshot, which can be stored e.g. with :func:`json.dump`.
+        """
+        values = dict((name, value.tolist() if isinstance(value, np.ndarray) else value) for name, value in self.values.items())
+        return dict(experiment=self.experiment, time=self.time, values=values)
+
+    @classmethod
+    def fromDict(cls, d):
+        """
+        :param d:   Dictionary as returned by :meth:`toDict`.
+        :returns:   :class:`~Snapshot` instance.
+        """
+        values = dict((name, np.array(value) if isinstance(value, list) else value) for name, value in d['values'].items())
+        return cls(d['experiment'], values, d.get('time'))
+
+    def __repr__(self):
+        return "<%s of '%s' with %u parameters>" % (self.__class__.__name__, self.experiment, len(self.values))
+
+
 class Experiment(object):
+    # parameters may change while the experiment runs, so these discard cached parameter values
+    _invalidatingexp = ['aqExpRun', 'aqExpRunAndWait', 'aqExpSync']
     _implicitexp = [
         'aqExpRunAndWait',
         'aqExpActivate',
@@ -1010,8 +2073,17 @@ class Experiment(object):
     ]
 
     def __init__(self, parent, name_or_vp=-1, exptype=None, axs1=None, axs2=None, ordaxs=None, addgrad=False, addgonio=False, addvtu=False):
-        self._fupardict = dict()
-        self._fuparhist = dict()
+        self._fulist = None
+        self._funames = None
+        self._fupardict = None
+        self._fucatalogkey = None
+        self._parindex = dict()
+        self._parnames = dict()
+        self._parmeta = dict()
+        self._values = dict()
+        self.cachevalues = False
+        self.cachetolerance = 0.0
+        self.savedcalls = 0
         self._parent = parent
         anyextraparam = any((exptype, axs1, axs2, ordaxs, addgrad, addgonio, addvtu))
         self._expstates = dict(
@@ -1056,9 +2128,6 @@ class Experiment(object):
                             self._expname = name_or_vp
             else:
                 raise ValueError('%sfirst argument must be either the experiment name or the viewport number' % _msgprefix)
-        if not hasattr(self, self._implicitexp[0]):
-            for fkt in self._implicitexp:
-                setattr(self, fkt, types.MethodType(eval('lambda self, *p : self._parent.%s(self.getExp(), *p)' % fkt), self))
 
     def getFuList(self):
         """
@@ -1070,15 +2139,17 @@ class Experiment(object):
                 >>> print(exp.getFuList())   # print functional units of hidden experiment
                 ['specJet', 'freqCounter', 'sysConf', 'gTempCtrl', 'cwBridge', 'sctCalib', 'ffLock', 'ftBridge']
         """
-        if self._fupardict:
-            return self._fupardict.keys()
-        buf = self._parent.Xeprbuf(10000)
-        self.aqGetExpFuList(buf, 10000)
-        return buf.get_unicode_str().split(',')
+        if self._fulist is None:
+            buf = self._parent.Xeprbuf(10000)
+            self.aqGetExpFuList(buf, 10000)
+            self._fulist = buf.get_unicode_str().split(',')
+        return list(self._fulist)
 
     def getFuParList(self, funame):
         """
-            Get the list of paramater names for the functional unit *funame*.
+            Get the list of paramater names for the functional unit *funame*. The lists are kept in a catalog on disk (in
+            :data:`CACHEDIR`, unless disabled by the *usecache* argument of :class:`~Xepr`), which is shared by all experiments with
+            the same functional units, and requested from **Xepr** only for functional units not in the catalog yet.
 
             :param funame:      Specifies the name of the functional unit to list the parameter names for.
             :type funame:       string
@@ -1090,86 +2161,117 @@ class Experiment(object):
                 >>> print(exp.getFuParList("cwbridge"))     # print list of parameter for cwbridge unit
                 ['AcqFineTuning', 'Power', 'PowerAt0dBMon', 'PowerAtten', 'PowerAttenMon']
         """
-        if not self._fupardict:
-            buf = self._parent.Xeprbuf(10000)
-            for fu in self.getFuList():
-                self.aqGetExpFuParList(fu, buf, 10000)
-                parlist = [x for x in buf.get_unicode_str().split(',') if self.aqGetParType('%s.%s' % (fu, x)) != self._parent.AQ_DT_UNKNOWN]
-                self._fupardict[fu] = parlist
-
-        if funame not in self._fupardict:
-            for fu in self.getFuList():
-                if fu.upper() == funame.upper():
-                    funame = fu
-                    break
-
-        if funame not in self._fupardict:
+        if self._funame(funame) is None:
             raise ParameterError("%sno such functional unit '%s' in experiment '%s'" % (_msgprefix, funame, self.aqGetExpName()))
-        return self._fupardict[funame]
+        funame = self._funame(funame)
+
+        catalog = self._fucatalog()
+        if funame not in catalog:
+            buf = self._parent.Xeprbuf(10000)
+            self.aqGetExpFuParList(funame, buf, 10000)
+            catalog[funame] = [x for x in buf.get_unicode_str().split(',') if self.aqGetParType('%s.%s' % (funame, x)) != self._parent.AQ_DT_UNKNOWN]
+            if self._parent._usecache:
+                stored = _loadcache(self._fucatalogkey) or dict()  # other scripts may have added functional units meanwhile
+                stored.update(catalog)
+                _storecache(self._fucatalogkey, stored)
+        return catalog[funame]
+
+    def _fucatalog(self):
+        # parameter names by functional unit, for all experiments with the same functional units in the same Xepr version
+        if self._fupardict is None:
+            self._fucatalogkey = ['fucatalog'] + self._parent._versionkey + [self.getFuList()]
+            self._fupardict = (_loadcache(self._fucatalogkey) if self._parent._usecache else None) or dict()
+        return self._fupardict
+
+    def invalidateFuCatalog(self):
+        """
+        Discards the catalog of functional units and their parameters (see :meth:`getFuParList`), both in memory and on disk, as
+        well as the cached parameter metadata (see :meth:`invalidateParCache`).
+        """
+        if self._fucatalogkey is not None and self._parent._usecache:
+            _storecache(self._fucatalogkey, dict())
+        self._fulist = None
+        self._funames = None
+        self._fupardict = None
+        self._fucatalogkey = None
+        self._parindex = dict()
+        self.invalidateParCache()
+
+    def _funame(self, funame):
+        # case-insensitive lookup of a functional unit, None if there is no such unit
+        if self._funames is None:
+            self._funames = dict((fu.upper(), fu) for fu in reversed(self.getFuList()))
+        return self._funames.get(funame.upper())
+
+    def _fuparindex(self, fu):
+        # case-insensitive index of the parameters of a functional unit, mapping names to qualified names
+        index = self._parindex.get(fu)
+        if index is None:
+            index = self._parindex[fu] = dict((par.upper(), '%s.%s' % (fu, par)) for par in reversed(self.getFuParList(fu)))
+        return index
 
     def findParam(self, param, findall=False):
         """
         Finds the fully qualified parameter name for the name given by *param*
 
-        :param param:   Name of the parameter to look for.
-        :type param:    string, case-insensitive
+        :param param:   Name of the parameter to look for, optionally qualified by the name of the functional unit, e.g.
+                        "PowerAtten" or "cwBridge.PowerAtten". Glob patterns (see :mod:`fnmatch`) are matched against the
+                        parameter names, or against the qualified names if the pattern contains a dot, e.g. ``*Atten*`` or
+                        ``cwBridge.*``. A compiled regular expression is searched for in the qualified names.
+        :type param:    string, case-insensitive, or compiled regular expression
         :param findall: If *True*, all matching parameters will be returned as a list; if *False*, only the first matching
                         parameter will be returned.
         :type findall:  *True* or *False*, default = *False*
         :returns:       List of matching parameters if *findall=True*, parameter string otherwise.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> print(exp.findParam("*Atten*", findall=True))
+            ['cwBridge.PowerAtten', 'cwBridge.PowerAttenMon']
+            >>> print(exp.findParam(re.compile(r"^fieldCtrl\\..*Field$"), findall=True))
+            ['fieldCtrl.CenterField']
         """
-        param = param.replace('*', '').strip()
-        if not param:
-            if not findall:
-                return
-            return []
-        if param in self._fuparhist and not findall:
-            return self._fuparhist[param]
-        p = param.split('.')
-        if len(p) not in (1, 2):
-            if not findall:
-                return
-            return []
-        if len(p) == 1 or not p[0]:
-            fulist = self.getFuList()
+        if isinstance(param, _PATTERNTYPE):
+            return self._matchparams(lambda fu, par: param.search('%s.%s' % (fu, par)), findall)
+        param = param.strip()
+        if _GLOBCHARS.search(param):
+            pattern = re.compile(fnmatch.translate(param), re.IGNORECASE)
+            if '.' in param:
+                return self._matchparams(lambda fu, par: pattern.match('%s.%s' % (fu, par)), findall)
+            return self._matchparams(lambda fu, par: pattern.match(par), findall)
+
+        fu, sep, par = param.rpartition('.')
+        if not par or '.' in fu:
+            return [] if findall else None
+        if fu:
+            fulist = [self._funame(fu)] if self._funame(fu) is not None else []
         else:
-            fulist = [fu for fu in self.getFuList() if fu.upper() == p[0].upper()]
+            fulist = self.getFuList()
         parlist = []
         for fu in fulist:
+            qualified = self._fuparindex(fu).get(par.upper())
+            if qualified is not None:
+                if not findall:
+                    return qualified
+                parlist.append(qualified)
+        return parlist if findall else None
+
+    def _matchparams(self, match, findall):
+        parlist = []
+        for fu in self.getFuList():
             for par in self.getFuParList(fu):
-                if p[-1].upper() == par.upper():
-                    parlist.append('%s.%s' % (fu, par))
+                if match(fu, par):
                     if not findall:
-                        break
-
-            if not findall and parlist:
-                break
-
-        if parlist:
-            if len(parlist) == 1:
-                self._fuparhist[param] = '%s' % parlist[0]
-            if findall:
-                return parlist
-            return parlist[0]
-        if findall:
-            return []
-        return
+                        return '%s.%s' % (fu, par)
+                    parlist.append('%s.%s' % (fu, par))
+        return parlist if findall else None
 
     def __contains__(self, param):
-        param = param.replace('*', '').strip()
-        if not param:
-            return False
-        p = param.split('.')
-        if len(p) not in (1, 2):
-            return False
-        if len(p) == 2 and not p[1]:
-            for fu in self.getFuList():
-                if fu.upper() == p[0].upper():
-                    return True
-
-        else:
-            return self.findParam(param) is not None
-        return False
+        fu, sep, par = param.strip().rpartition('.')
+        if fu and par.strip('*') == '' and not _GLOBCHARS.search(fu):
+            return self._funame(fu) is not None
+        return self.findParam(param) is not None
 
     def getExp(self):
         return self._exp
@@ -1187,10 +2289,389 @@ class Experiment(object):
             return self.aqGetExpState() == self._expstates[name]
         return object.__getattribute__(self, name)
 
+    def aqExpRunAsync(self, timeout=None, cancelwith='abort', pollinterval=0.05):
+        """
+        Non-blocking variant of :meth:`aqExpRunAndWait`. Starts the experiment and waits for it to finish in a background thread.
+        The connection to **Xepr** is only locked while the experiment state is queried, so other threads can keep reading
+        parameters or datasets while the experiment is running.
+
+        :param timeout:         Maximum run time in seconds. If the experiment is still running after *timeout* seconds, it is
+                                halted as specified by *cancelwith* and the future fails with an :class:`ExperimentError`.
+        :type timeout:          float or None; default = None, i.e. no time limit
+        :param cancelwith:      Specifies how the experiment is halted upon cancellation or timeout, either by "abort" (see
+                                *aqExpAbort*) or by "stop" (see *aqExpStop*).
+        :type cancelwith:       string; default = "abort"
+        :param pollinterval:    Interval in seconds for querying the experiment state.
+        :type pollinterval:     float; default = 0.05
+        :returns:               :class:`concurrent.futures.Future`, whose *result()* waits for the experiment to finish.
+                                Calling its *cancel()* method halts the experiment.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> run = exp.aqExpRunAsync(timeout=600)    # start the experiment
+            >>> while not run.done():                   # meanwhile, parameters remain accessible
+            ...     print(exp['Temperature'].value)
+            ...     time.sleep(1)
+            >>> run.result()                            # raises ExperimentError if the experiment timed out
+        """
+        if cancelwith not in ('abort', 'stop'):
+            raise ValueError("%scancelwith must be either 'abort' or 'stop'" % _msgprefix)
+        halt = self.aqExpAbort if cancelwith == 'abort' else self.aqExpStop
+        future = Future()
+        wakeup = Event()
+        future.add_done_callback(lambda f: wakeup.set())
+        self.aqExpRun()
+        Thread(target=self._waitforrun, args=(future, wakeup, halt, timeout, pollinterval), daemon=True).start()
+        return future
+
+    def _waitforrun(self, future, wakeup, halt, timeout, pollinterval):
+        # the future stays pending until the experiment has finished, so that cancel() works while the experiment runs
+        deadline = None if timeout is None else time.monotonic() + timeout
+        busy = (self._parent.AQ_EXP_RUNNING, self._parent.AQ_EXP_PAUSED)
+        try:
+            while not future.cancelled():
+                if self.aqGetExpState() not in busy:
+                    future.set_result(None)
+                    return
+                if deadline is not None and time.monotonic() >= deadline:
+                    halt()
+                    future.set_exception(ExperimentError('%sexperiment did not finish within %g s' % (_msgprefix, timeout)))
+                    return
+                wakeup.wait(pollinterval if deadline is None else min(pollinterval, max(0.0, deadline - time.monotonic())))
+            halt()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+
+    def waitFor(self, state, timeout=None, latency=0.1, mininterval=1e-3):
+        """
+        Waits until the experiment is in the state *state*. See :meth:`waitUntil` for the polling strategy and the remaining
+        parameters.
+
+        :param state:   Experiment state to wait for, either by name ("isRunning", "isPaused", "isActive", "isEdit", "isClosed",
+                        "isInstalled") or as a ProDeL constant such as *AQ_EXP_RUNNING*.
+        :returns:       :class:`WaitStatistics` for the wait.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> exp.waitFor("isRunning")                # wait for the operator to start the experiment
+            >>> stats = exp.waitFor("isPaused", timeout=10)
+            >>> print(stats.polls, stats.meanpolltime)
+        """
+        if isinstance(state, string_types):
+            if state not in self._expstates:
+                raise ValueError("%sno such experiment state '%s'" % (_msgprefix, state))
+            state = self._expstates[state]
+        return self.waitUntil(lambda: self.aqGetExpState() == state, timeout=timeout, latency=latency, mininterval=mininterval)
+
+    def waitUntil(self, predicate, timeout=None, latency=0.1, mininterval=1e-3):
+        """
+        Waits until *predicate()* returns a true value, e.g. until a parameter of the experiment reaches some value. Rather than
+        polling as fast as possible, the interval between two calls of *predicate* starts at *mininterval* and is doubled after each
+        unsuccessful call, up to *latency*. Intervals are randomly shortened by up to 50% so that several waiting scripts do not
+        poll **Xepr** in lockstep.
+
+        :param predicate:   Function without arguments, called repeatedly until it returns a true value.
+        :param timeout:     Maximum time to wait in seconds.
+        :type timeout:      float or None; default = None, i.e. no time limit
+        :param latency:     Maximum interval between two polls in seconds, i.e. the maximum delay for noticing the change.
+        :type latency:      float; default = 0.1
+        :param mininterval: Interval in seconds after the first unsuccessful poll.
+        :type mininterval:  float; default = 0.001
+        :returns:           :class:`WaitStatistics` for the wait.
+        :raises:            :class:`ExperimentError` if *predicate* did not become true within *timeout* seconds.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> scansdone = exp['NbScansDone']
+            >>> exp.waitUntil(lambda: scansdone.value >= 10, latency=0.5)
+        """
+        start = time.monotonic()
+        interval, polls, polltime, maxpolltime, maxinterval = mininterval, 0, 0.0, 0.0, 0.0
+        while True:
+            t0 = time.monotonic()
+            done = predicate()
+            t1 = time.monotonic()
+            polls += 1
+            polltime += t1 - t0
+            maxpolltime = max(maxpolltime, t1 - t0)
+            if done:
+                return WaitStatistics(polls, t1 - start, polltime / polls, maxpolltime, maxinterval)
+            if timeout is not None and t1 - start >= timeout:
+                raise ExperimentError('%scondition not met within %g s (%u polls)' % (_msgprefix, timeout, polls))
+            sleep = random.uniform(0.5, 1.0) * interval
+            if timeout is not None:
+                sleep = min(sleep, start + timeout - t1)
+            maxinterval = max(maxinterval, sleep)
+            time.sleep(sleep)
+            interval = min(2 * interval, latency)
+
+    def captureScans(self, filename=None, xeprset='primary', latency=1e-2, timeout=None):
+        """
+        Captures the individual scans of a multi-scan experiment. After each scan, the experiment is paused, the dataset is
+        retrieved and the experiment is resumed right away, before the scan is handed over, so that processing the scan overlaps
+        with acquiring the next one. The experiment has to run in replace mode for the dataset to contain the last scan only.
+
+        :param filename:    Template for the names of the files to save the scans to with :func:`numpy.save`, formatted with the
+                            scan number, e.g. "/tmp/scan%04u.npy". The files are written in a background thread.
+        :type filename:     string or None; default = None, i.e. scans are not saved
+        :param xeprset:     Dataset of the **Xepr** application the scans are acquired into.
+        :type xeprset:      string; default = "primary"
+        :param latency:     Maximum interval for polling the experiment state, see :meth:`waitUntil`.
+        :type latency:      float; default = 0.01
+        :param timeout:     Maximum time in seconds to wait for the experiment to start, to pause or to update the number of scans
+                            done; see :meth:`waitUntil`.
+        :type timeout:      float or None; default = None, i.e. no time limit
+        :returns:           Generator yielding a :class:`ScanCapture` for each scan, until the number of scans to do is reached.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> for capture in exp.captureScans("/tmp/scan%04u.npy"):
+            ...     print("scan %u: max %g, experiment held for %.1f ms" % (capture.scan, capture.ordinate.max(),
+            ...                                                             1e3 * capture.heldtime))
+        """
+        todo = int(self['NbScansToDo'].value)
+        scansdone = self['NbScansDone']
+        writer = _ScanWriter() if filename else None
+        dset = None
+        done = [0]
+
+        def advanced(last):
+            done[0] = int(scansdone.value)
+            return done[0] != last
+
+        try:
+            while done[0] < todo:
+                self.waitFor('isRunning', timeout=timeout, latency=latency)
+                t0 = time.monotonic()
+                self.aqExpPause()
+                self.waitFor('isPaused', timeout=timeout, latency=latency)
+                t1 = time.monotonic()
+                self.aqExpSync()
+                last = done[0]
+                self.waitUntil(lambda: advanced(last), timeout=timeout, latency=latency)
+                t2 = time.monotonic()
+                if dset is None:
+                    dset = self._parent.XeprDataset(xeprset=xeprset)
+                else:
+                    dset.update()
+                ordinate = dset.O
+                t3 = time.monotonic()
+                self.aqExpRun()
+                t4 = time.monotonic()
+                if writer is not None:
+                    writer.put(filename % done[0], ordinate.copy())  # the caller may modify ordinate while it is saved
+                yield ScanCapture(done[0], ordinate, t1 - t0, t2 - t1, t3 - t2, t4 - t1)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def snapshot(self, params=None, arrays=False):
+        """
+        Reads the values of many parameters at once. The values are requested in a single batch (see :meth:`Xepr.batch`), as is the
+        type of the parameters not accessed before.
+
+        :param params:  Names of the parameters to read; glob patterns and regular expressions are resolved with :meth:`findParam`.
+        :type params:   list of strings or None; default = None, i.e. all parameters of the experiment
+        :param arrays:  If *True*, multi-dimensional parameters are read as well, element by element; if *False*, they are skipped.
+        :type arrays:   *True* or *False*; default = *False*
+        :returns:       :class:`~Snapshot` instance.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> config = exp.snapshot()
+            >>> json.dump(config.toDict(), open("config.json", "w"))
+            >>> print(exp.snapshot().diff(config))      # what has changed since?
+        """
+        xepr = self._parent
+        if params is None:
+            names = ['%s.%s' % (fu, par) for fu in self.getFuList() for par in self.getFuParList(fu)]
+        else:
+            names = self._findparams(params)
+
+        missing = [name for name in names if name.upper() not in self._parnames]
+        if missing:
+            with xepr.batch() as batch:
+                pending = [(name, batch.submit('aqGetParType', self._exp, name), batch.submit('aqGetParNbDim', self._exp, name))
+                           for name in missing]
+            for name, partype, dim in pending:
+                self._parmeta.setdefault(name, dict(type=partype.result(), dim=dim.result()))
+                self._parnames[name.upper()] = name
+
+        params = [Parameter(self, name) for name in names]
+        if arrays:
+            shapes = dict((par._name, tuple(int(par.aqGetParDimSize(d)) for d in range(par._dim))) for par in params if par._dim)
+        values = dict()
+        with xepr.batch() as batch:
+            for par in params:
+                if par._dim == 0:
+                    values[par._name] = self._submitread(batch, par, 0, xepr.NIL)
+                elif arrays:
+                    shape = shapes[par._name]
+                    values[par._name] = (shape, [self._submitread(batch, par, par._dim, np.array(idx, dtype=np.int32))
+                                                 for idx in np.ndindex(*shape)])
+        for name, value in values.items():
+            if isinstance(value, tuple):
+                shape, elements = value
+                values[name] = np.array([element() for element in elements]).reshape(shape)
+            else:
+                values[name] = value()
+        return Snapshot(self.aqGetExpName(), values, time.time())
+
+    def _findparams(self, params):
+        # resolves names and patterns to a list of qualified names without duplicates
+        names, seen = [], set()
+        for param in ([params] if isinstance(params, string_types) else params):
+            found = self.findParam(param, findall=True)
+            if not found:
+                raise ParameterError("%sno such parameter '%s' in experiment '%s'" % (_msgprefix, param, self.aqGetExpName()))
+            names.extend(name for name in found if name not in seen)
+            seen.update(found)
+        return names
+
+    def _submitread(self, batch, par, dim, index):
+        # queues reading a parameter value, returns a function for retrieving the value after the batch was executed
+        xepr = self._parent
+        if par._type == xepr.AQ_DT_STRING or (par._type == xepr.AQ_DT_ENUM and par._enum == str):
+            buf = xepr.Xeprbuf(1024)
+            future = batch.submit('aqGetStrParValue', self._exp, par._name, dim, index, buf, len(buf))
+
+            def value():
+                future.result()  # raises if the call failed
+                return buf.get_unicode_str()
+            return value
+        if par._type == xepr.AQ_DT_ENUM:
+            fkt = 'aqGetIntParValue'
+        elif par._type == xepr.AQ_DT_BOOLEAN:
+            fkt = 'aqGetBoolParValue'
+        else:
+            fkt = 'aqGetRealParValue'
+        return batch.submit(fkt, self._exp, par._name, dim, index).result
+
+    def apply(self, snapshot, params=None):
+        """
+        Sets parameters to the values of a snapshot. Only the parameters whose values differ from the current ones are written (in a
+        single batch, see :meth:`Xepr.batch`). Parameters that cannot be set, e.g. monitoring parameters like the measured
+        temperature, are skipped; the other parameters are written nevertheless.
+
+        :param snapshot:    Values to apply.
+        :type snapshot:     :class:`~Snapshot`
+        :param params:      Names of the parameters to apply, as for :meth:`snapshot`.
+        :type params:       list of strings or None; default = None, i.e. all parameters of the snapshot
+        :returns:           List of the names of the parameters written, i.e. without those skipped.
+
+        Example::
+
+            # ...suppose we already have an Experiment object...
+            >>> config = Snapshot.fromDict(json.load(open("config.json")))
+            >>> exp.apply(config, params=["fieldCtrl.*", "cwBridge.PowerAtten"])
+            ['fieldCtrl.CenterField']
+        """
+        names = list(snapshot.values)
+        if params is not None:
+            wanted = set(self._findparams(params))
+            names = [name for name in names if name in wanted]
+        arrays = any(isinstance(snapshot.values[name], np.ndarray) for name in names)
+        changes = snapshot.diff(self.snapshot(names, arrays=arrays))
+        writes = []  # (name, function writing one value)
+        for name in names:
+            if name not in changes:
+                continue
+            value, current = changes[name]
+            par = Parameter(self, name)
+            if par._dim == 0:
+                writes.append((name, lambda par=par, value=value: setattr(par, 'value', value)))
+            else:
+                value = np.asarray(value)
+                if value.shape != np.shape(current):
+                    raise ParameterError("%sparameter '%s' has shape %s, snapshot has shape %s" % (_msgprefix, name, np.shape(current), value.shape))
+                for idx in zip(*np.nonzero(_changed(value, current))):
+                    writes.append((name, lambda par=par, idx=idx, value=value[idx].item(): par.__setitem__(idx, value)))
+
+        # a failing call cancels the rest of its batch, so the writes after the failing parameter are queued again
+        xepr, skipped = self._parent, set()
+        while writes:
+            queued = []  # position in writes of each queued call
+            try:
+                with xepr.batch():
+                    registered = xepr._batches[get_ident()]
+                    for n, (name, write) in enumerate(writes):
+                        write()
+                        queued.extend([n] * (len(registered._calls) - len(queued)))
+                writes = []
+            except BatchError as error:
+                n = queued[error.index]
+                name = writes[n][0]
+                skipped.add(name)
+                xepr._printmsg("parameter '%s' cannot be set, skipped" % name)
+                writes = [write for write in writes[n + 1:] if write[0] != name]
+        return [name for name in names if name in changes and name not in skipped]
+
     def select(self, viewport=-1):
         self._parent.aqSetSelectedExp(viewport, self._expname)
         self._parent.XeprGUIrefresh()
 
+    def _parmetadata(self, name):
+        # returns the qualified name of the parameter and its metadata, which is shared by all Parameter objects for it
+        key = name.upper()
+        qualified = self._parnames.get(key)
+        if qualified is None:
+            # names are resolved to the qualified name listed for the functional unit, so that the metadata and values of a
+            # parameter are cached under one name, however it is addressed
+            found = self.findParam(name, findall=True)
+            if len(found) > 1:
+                raise ParameterError("%sparameter name '%s' is ambiguous in experiment '%s'" % (_msgprefix, name, self.aqGetExpName()))
+            qualified = found[0] if found else name
+            partype = self.aqGetParType(qualified)
+            if partype == self._parent.AQ_DT_UNKNOWN:
+                raise ParameterError("%sno such parameter '%s' in experiment '%s'" % (_msgprefix, qualified, self.aqGetExpName()))
+            if qualified not in self._parmeta:
+                self._parmeta[qualified] = dict(type=partype, dim=self.aqGetParNbDim(qualified))
+            self._parnames[key] = qualified
+        return qualified, self._parmeta[qualified]
+
+    def invalidateParCache(self, name=None):
+        """
+        Discards cached parameter metadata. :class:`~Parameter` objects are created from cached metadata (type, number of
+        dimensions) after the first access of a parameter, and limits, steps, dimension sizes, units and labels are only read once
+        per parameter. Invalidate the cache if the metadata may have changed, e.g. when the limits of a parameter depend on the
+        values of other parameters.
+
+        :param name:    Name of the parameter whose limits, steps, dimension sizes, units and label are discarded; if *None*,
+                        everything cached is discarded.
+        :type name:     string or None; default = None
+        """
+        if name is None:
+            metas = list(self._parmeta.values())
+            self._parnames = dict()
+            self._parmeta = dict()
+        else:
+            metas = [self._parmetadata(name)[1]]
+        for meta in metas:
+            for key in [k for k in meta if isinstance(k, tuple)]:
+                del meta[key]
+
+    def invalidateValueCache(self, name=None):
+        """
+        Discards the parameter values remembered while :attr:`cachevalues` is enabled. This happens automatically upon *aqExpRun*,
+        *aqExpRunAndWait* and *aqExpSync*, but is required after parameters were changed otherwise, e.g. by the operator of
+        **Xepr** or by Xepr commands.
+
+        :param name:    Name of the parameter whose values are discarded; if *None*, all values are discarded.
+        :type name:     string or None; default = None
+        """
+        if name is None:
+            self._values.clear()
+        else:
+            name = self._parmetadata(name)[0]
+            for key in [k for k in self._values if k == name or (isinstance(k, tuple) and k[0] == name)]:
+                del self._values[key]
+
     def __getitem__(self, name):
         return Parameter(self, name)
 
@@ -1213,6 +2694,25 @@ class Experiment(object):
         return "<{0}('{1}')>".format(self.__class__.__name__, self.aqGetExpName())
 
 
+def _invalidatingmethod(method):
+    """
+    Returns *method*, extended to discard the parameter values cached by the experiment (see :attr:`Experiment.cachevalues`).
+    """
+    def invalidating(self, *p):
+        try:
+            return method(self, *p)
+        finally:
+            self._values.clear()
+    invalidating.__name__ = invalidating.__qualname__ = method.__name__
+    return invalidating
+
+
+for _fkt in Experiment._implicitexp:
+    setattr(Experiment, _fkt, _implicitmethod(_fkt, Experiment.getExp))
+for _fkt in Experiment._invalidatingexp:
+    setattr(Experiment, _fkt, _invalidatingmethod(getattr(Experiment, _fkt)))
+
+
 class Parameter(object):
     _implicitpar = [
         'aqGetParCoarseSteps',
@@ -1235,26 +2735,22 @@ class Parameter(object):
         'aqSetIntParValue'
     ]
 
+    # metadata read once per parameter and kept in the cache of the experiment, see Experiment.invalidateParCache
+    _cachedpar = [
+        'aqGetParCoarseSteps',
+        'aqGetParFineSteps',
+        'aqGetParMaxValue',
+        'aqGetParMinValue',
+        'aqGetParDimSize',
+        'aqGetParUnits',
+        'aqGetParLabel',
+    ]
+
     def __init__(self, parent, name, enum=None):
         self._parent = parent
-        self._name = name
-        self._type = self._parent.aqGetParType(name)
-        if self._type == self._parent._parent.AQ_DT_UNKNOWN:
-            self._name = self._parent.findParam(name, findall=True)
-            if isinstance(self._name, list):
-                if len(self._name) > 1:
-                    raise ParameterError("%sparameter name '%s' is ambiguous in experiment '%s'" % (_msgprefix, name, self._parent.aqGetExpName()))
-                else:
-                    self._name = self._name[0] if len(self._name) == 1 else None
-            if self._name is not None:
-                name = self._name
-                self._type = self._parent.aqGetParType(name)
-            if self._type == self._parent._parent.AQ_DT_UNKNOWN:
-                raise ParameterError("%sno such parameter '%s' in experiment '%s'" % (_msgprefix, name, self._parent.aqGetExpName()))
-        self._dim = self._parent.aqGetParNbDim(name)
-        if not hasattr(self, self._implicitpar[0]):
-            for fkt in self._implicitpar:
-                setattr(self, fkt if not hasattr(self, fkt) else '_%s_' % fkt, types.MethodType(eval('lambda self, *p : self._parent.%s(self._name, *p)' % fkt), self))
+        self._name, self._meta = parent._parmetadata(name)
+        self._type = self._meta['type']
+        self._dim = self._meta['dim']
 
         xepr = self._parent._parent
         if self._type == xepr.AQ_DT_BOOLEAN:
@@ -1271,6 +2767,12 @@ class Parameter(object):
                 raise TypeError("%san enum type parameter may only return 'int' or 'str' values" % _msgprefix)
             self._enum = enum if enum else str
 
+    def aqGetParType(self):
+        return self._type
+
+    def aqGetParNbDim(self):
+        return self._dim
+
     def aqGetEnumParValue(self, *p):
         if self._enum == str:
             return self.aqGetStrParValue(*p)
@@ -1286,8 +2788,40 @@ class Parameter(object):
             raise TypeError('%sneed integer or string value to set enum type parameter' % _msgprefix)
 
     def aqStepParValue(self, steps=1, finesteps=False):
+        self._parent._values.pop(self._name, None)
         self._aqStepParValue_(1, self._parent._parent.NIL, finesteps, steps)
 
+    def _readvalue(self, key, dim, idx):
+        value = self._getpar(dim, idx)
+        if self._parent.cachevalues:
+            self._parent._values[key] = value
+        return value
+
+    def _writevalue(self, key, dim, idx, value):
+        exp = self._parent
+        if exp.cachevalues:
+            if key in exp._values and self._samevalue(exp._values[key], value):
+                exp.savedcalls += 1
+                return
+            xepr = exp._parent
+            batch = xepr._batches.get(get_ident()) if xepr._batches else None
+            exp._values.pop(key, None)
+            self._setpar(dim, idx, value)
+            if batch is None:
+                exp._values[key] = value
+            else:  # the write is only queued, the value is known once it has been executed
+                batch._onsuccess(lambda: exp._values.__setitem__(key, value))
+        else:
+            self._setpar(dim, idx, value)
+
+    def _samevalue(self, cached, value):
+        if type(cached) is bool or type(value) is bool or isinstance(cached, string_types) or isinstance(value, string_types):
+            return type(cached) is type(value) and cached == value
+        try:
+            return abs(cached - value) <= self._parent.cachetolerance
+        except TypeError:
+            return False
+
     def __getitem__(self, idx):
         if self._dim == 0:
             raise IndexError("%sparameter is a scalar, use 'value' attribute to get its value" % _msgprefix)
@@ -1295,11 +2829,7 @@ class Parameter(object):
             idx = (idx,)
         if len(idx) != self._dim:
             raise IndexError('%sparameter has %u dimensions, given index has %u dimensions' % (_msgprefix, self._dim, len(idx)))
-        buf = self._parent._parent.Xeprbuf(self._dim, dtype=np.int32)
-        for i, d in enumerate(idx):
-            buf.buffer[i] = d
-
-        return self._getpar(self._dim, buf)
+        return self._readvalue((self._name, tuple(int(i) for i in idx)), self._dim, np.array(idx, dtype=np.int32))
 
     def __setitem__(self, idx, value):
         if self._dim == 0:
@@ -1308,25 +2838,345 @@ class Parameter(object):
             idx = (idx,)
         if len(idx) != self._dim:
             raise IndexError('%sparameter has %u dimensions, given index has %u dimensions' % (_msgprefix, self._dim, len(idx)))
-        buf = self._parent._parent.Xeprbuf(self._dim, dtype=np.int32)
-        for i, d in enumerate(idx):
-            buf.buffer[i] = d
-
-        return self._setpar(self._dim, buf, value)
+        self._writevalue((self._name, tuple(int(i) for i in idx)), self._dim, np.array(idx, dtype=np.int32), value)
 
     @property
     def value(self):
         if self._dim != 0:
             raise ParameterError("%sparameter '%s' in experiment '%s' is not a scalar (has %u dimensions)" % (_msgprefix, self._name, self._parent.aqGetExpName(), self._dim))
         else:
-            return self._getpar(0, self._parent._parent.NIL)
+            return self._readvalue(self._name, 0, self._parent._parent.NIL)
 
     @value.setter
     def value(self, val):
         if self._dim != 0:
             raise ParameterError("%sparameter '%s' in experiment '%s' is not a scalar (has %u dimensions)" % (_msgprefix, self._name, self._parent.aqGetExpName(), self._dim))
         else:
-            self._setpar(0, self._parent._parent.NIL, val)
+            self._writevalue(self._name, 0, self._parent._parent.NIL, val)
+
+
+def _cachedparmethod(fkt):
+    """
+    Returns a method like :func:`_implicitmethod` for parameters, whose results are kept in the metadata cache of the experiment.
+    """
+    def method(self, *p):
+        key = (fkt,) + p
+        try:
+            return self._meta[key]
+        except KeyError:
+            value = self._meta[key] = getattr(self._parent, fkt)(self._name, *p)
+            return value
+    method.__name__ = method.__qualname__ = fkt
+    return method
+
+
+for _fkt in Parameter._implicitpar:
+    setattr(Parameter, _fkt if not hasattr(Parameter, _fkt) else '_%s_' % _fkt,
+            _cachedparmethod(_fkt) if _fkt in Parameter._cachedpar else _implicitmethod(_fkt, lambda self: self._name))
+
+
+class Watch(object):
+    """
+    Handle for a watch on an experiment state or a parameter value, as returned by :meth:`Xepr.watch`.
+
+    .. attribute:: target
+
+        The watched :class:`~Experiment` or :class:`~Parameter`.
+
+    .. attribute:: event
+
+        :class:`asyncio.Event` that is set upon each change if the watch was created with an event loop but without a callback;
+        *None* otherwise.
+
+    .. attribute:: error
+
+        Exception raised while reading the watched state or value, or by the callback; *None* while the watch is active. Such an
+        exception ends the watch (and sets *event*).
+    """
+
+    def __init__(self, watcher, target, key, callback, interval, loop):
+        self._watcher = watcher
+        self._key = key
+        self._loop = loop
+        self.target = target
+        self.callback = callback
+        self.interval = interval
+        self.event = None
+        if callback is None:
+            # before Python 3.10, asyncio primitives bind to the current thread's event loop upon creation, not to the one in use
+            self.event = asyncio.Event(loop=loop) if sys.version_info < (3, 10) else asyncio.Event()
+        self.error = None
+
+    @property
+    def active(self):
+        """*True* until the watch is cancelled or has ended because of an error."""
+        return self._watcher.contains(self)
+
+    def cancel(self):
+        """Stops watching."""
+        self._watcher.remove(self)
+
+    def _dispatch(self, new, old):
+        if self.event is not None:
+            self._loop.call_soon_threadsafe(self.event.set)
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self.callback, new, old)
+        else:
+            self.callback(new, old)
+
+    def __repr__(self):
+        return "<%s.%s on %s every %g s>" % (self.__class__.__module__, self.__class__.__name__, '.'.join(self._key[:2]), self.interval)
+
+
+class _WatchSource(object):
+    # an experiment state or parameter value read once per poll on behalf of all its watches
+
+    def __init__(self, read):
+        self.read = read
+        self.watches = []
+        self.value = None
+        self.valid = False
+        self.due = time.monotonic()
+
+    @property
+    def interval(self):
+        return min([w.interval for w in self.watches] or [0.0])
+
+
+class _Watcher(object):
+    # polls the watched sources of a connection in a single thread, which only runs while there are watches
+
+    def __init__(self):
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._sources = dict()
+        self._thread = None
+
+    def add(self, key, read, watch):
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None:
+                source = self._sources[key] = _WatchSource(read)
+            source.watches.append(watch)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def remove(self, watch):
+        with self._lock:
+            source = self._sources.get(watch._key)
+            if source is not None and watch in source.watches:
+                source.watches.remove(watch)
+                if not source.watches:
+                    del self._sources[watch._key]
+        self._wakeup.set()
+
+    def contains(self, watch):
+        with self._lock:
+            source = self._sources.get(watch._key)
+            return source is not None and watch in source.watches
+
+    def clear(self):
+        with self._lock:
+            self._sources.clear()
+        self._wakeup.set()
+
+    def _fail(self, watches, error):
+        for watch in watches:
+            watch.error = error
+            self.remove(watch)
+            if watch.event is not None:
+                watch._loop.call_soon_threadsafe(watch.event.set)
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                if not self._sources:
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                due = [(k, s, list(s.watches)) for k, s in self._sources.items() if s.due <= now]
+            for key, source, watches in due:
+                try:
+                    value = source.read()
+                except Exception as e:
+                    self._fail(watches, e)
+                    continue
+                source.due = time.monotonic() + source.interval
+                changed = source.valid and value != source.value and not (value != value and source.value != source.value)
+                old, source.value, source.valid = source.value, value, True
+                if changed:
+                    for watch in watches:
+                        try:
+                            watch._dispatch(value, old)
+                        except Exception as e:
+                            self._fail((watch,), e)
+            with self._lock:
+                timeout = min([s.due for s in self._sources.values()] or [0.0]) - time.monotonic()
+            self._wakeup.wait(max(timeout, 0.0))
+
+
+class _AsyncProxy(object):
+    """
+    Base class of the asyncio facade. Methods of the wrapped object are called as coroutines, which run the call in the I/O thread
+    of the connection; returned :class:`~Experiment`, :class:`~Dataset` and :class:`~Parameter` objects are wrapped in turn.
+    Since each connection has a single I/O thread, calls are executed in the order they were awaited.
+    """
+
+    def __init__(self, obj, executor):
+        self._obj = obj
+        self._executor = executor
+
+    @property
+    def sync(self):
+        """The wrapped, blocking object."""
+        return self._obj
+
+    def _run(self, fkt, *p, **k):
+        p = tuple(x._obj if isinstance(x, _AsyncProxy) else x for x in p)
+        return asyncio.wrap_future(self._executor.submit(self._call, fkt, *p, **k))
+
+    def _call(self, fkt, *p, **k):
+        value = fkt(*p, **k)
+        proxy = _ASYNCPROXIES.get(type(value))
+        return proxy(value, self._executor) if proxy is not None else value
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def method(*p, **k):
+            return self._run(lambda *p, **k: getattr(self._obj, name)(*p, **k), *p, **k)
+        method.__name__ = method.__qualname__ = name
+        return method
+
+    def get(self, name):
+        """
+        Reads the attribute *name* of the wrapped object, e.g. *O* of a dataset or *value* of a parameter.
+
+        :returns:   Awaitable for the value of the attribute.
+        """
+        return self._run(getattr, self._obj, name)
+
+    def set(self, name, value):
+        """
+        Sets the attribute *name* of the wrapped object to *value*.
+
+        :returns:   Awaitable, done when the attribute is set.
+        """
+        return self._run(setattr, self._obj, name, value)
+
+    def __getitem__(self, key):
+        return self._run(self._obj.__getitem__, key)
+
+    def setitem(self, key, value):
+        """
+        Asynchronous counterpart of *obj[key] = value*.
+
+        :returns:   Awaitable, done when the item is set.
+        """
+        return self._run(self._obj.__setitem__, key, value)
+
+    def __repr__(self):
+        return '<%s.%s for %r>' % (self.__class__.__module__, self.__class__.__name__, self._obj)
+
+
+class AsyncXepr(_AsyncProxy):
+    """
+    Asyncio facade for a :class:`~Xepr` connection. All ProDeL functions and methods of :class:`~Xepr` are available as coroutine
+    functions, which execute the call in a dedicated I/O thread of the connection, so that the event loop is not blocked while
+    **Xepr** processes a call or a dataset is transferred. Attributes are read and written with :meth:`get` and :meth:`set`.
+
+    :param xepr:    Connection to wrap.
+    :type xepr:     :class:`~Xepr`
+
+    Example::
+
+        >>> async def main():
+        ...     async with await XeprAPI.AsyncXepr.connect() as xepr:
+        ...         exp = await xepr.XeprExperiment()          # AsyncExperiment
+        ...         power = await exp['PowerAtten']            # AsyncParameter
+        ...         await power.set('value', 20.0)
+        ...         await exp.aqExpRunAndWait()
+        ...         dset = await xepr.XeprDataset()            # AsyncDataset
+        ...         print((await dset.get('O')).max())
+        >>> asyncio.run(main())
+    """
+
+    def __init__(self, xepr, executor=None):
+        _AsyncProxy.__init__(self, xepr, executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='XeprAPI-io'))
+
+    @classmethod
+    async def connect(cls, *p, **k):
+        """
+        Connects to **Xepr** without blocking the event loop. The arguments are the same as for :class:`~Xepr`.
+
+        :returns:   :class:`~AsyncXepr` instance.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='XeprAPI-io')
+        try:
+            xepr = await asyncio.wrap_future(executor.submit(Xepr, *p, **k))
+        except BaseException:
+            executor.shutdown(wait=False)
+            raise
+        return cls(xepr, executor)
+
+    async def aclose(self):
+        """
+        Waits for pending calls and stops the I/O thread. The connection to **Xepr** itself stays open.
+        """
+        await asyncio.get_event_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+class AsyncExperiment(_AsyncProxy):
+    """
+    Asyncio facade for an :class:`~Experiment`, as returned by *AsyncXepr.XeprExperiment()*. *await exp[name]* returns an
+    :class:`~AsyncParameter`.
+    """
+
+    async def aqExpRunAndWait(self, timeout=None):
+        """
+        Runs the experiment and waits for it to finish. Unlike the blocking version, the I/O thread is not occupied while the
+        experiment is running (see :meth:`Experiment.aqExpRunAsync`); cancelling the awaiting task aborts the experiment.
+
+        :param timeout: Maximum run time in seconds.
+        :type timeout:  float or None; default = None, i.e. no time limit
+        """
+        run = await self._run(self._obj.aqExpRunAsync, timeout)
+        await asyncio.wrap_future(run)
+
+
+class AsyncDataset(_AsyncProxy):
+    """
+    Asyncio facade for a :class:`~Dataset`, as returned by *AsyncXepr.XeprDataset()*. *await dset.get('O')* transfers the ordinate
+    in the I/O thread.
+    """
+    pass
+
+
+class AsyncParameter(_AsyncProxy):
+    """
+    Asyncio facade for a :class:`~Parameter`.
+    """
+
+    def getValue(self):
+        """:returns: Awaitable for the value of the parameter, see :attr:`Parameter.value`."""
+        return self.get('value')
+
+    def setValue(self, value):
+        """:returns: Awaitable, done when the parameter is set to *value*."""
+        return self.set('value', value)
+
+
+_ASYNCPROXIES = {Experiment: AsyncExperiment, Dataset: AsyncDataset, Parameter: AsyncParameter}
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+#
+# marshallingBenchmark.py
+#
+# This script measures the per-call overhead of passing arguments to and
+# return values from ProDeL functions. It compares the dispatch-table based
+# marshalling of the XeprAPI module against the former isinstance-chain based
+# marshalling (reproduced below), using the same parameter-read calls a
+# typical parameter-heavy script issues.
+#
+#
+# Note: Prior to running any Xepr API scripts, the Xepr API has to be
+#       enabled once in Xepr by selecting the menu item "Enable Xepr API"
+#       from the "XeprAPI" sub-menu of the "Processing" menu. However,
+#       if the script is run from within Xepr (menu item "Run XeprAPI Script"),
+#       the API will be enabled automatically.
+#
+
+
+NUMBER_OF_CALLS = 20000
+
+
+import os, sys; sys.path.insert(0, os.popen("Xepr --apipath").read())  # this locates the XeprAPI module
+
+import ctypes
+import timeit
+import types
+
+import XeprAPI
+from XeprAPI import main
+
+
+def legacy_popvalue(self):
+    dtype_ord = ctypes.c_int()
+    data = ctypes.create_string_buffer(255)
+    self._API.XeprPopValue(ctypes.byref(dtype_ord), data)
+    dtype = main.STACK_TYPES[dtype_ord.value]
+    if dtype != main.pointer:
+        return dtype.from_buffer_copy(data).value
+    else:
+        return dtype.from_buffer_copy(data)
+
+
+def legacy_pushvalue(self, val):
+    if isinstance(val, main.pointer):
+        dtype = main.pointer
+    elif isinstance(val, bool):
+        dtype = ctypes.c_bool
+    elif isinstance(val, tuple(main.INT_TYPES)):
+        dtype = ctypes.c_int
+    elif isinstance(val, tuple(main.FLOAT_TYPES)):
+        dtype = ctypes.c_double
+    elif isinstance(val, main.char):
+        dtype = main.char
+    elif type(val) == str:
+        dtype = str
+    else:
+        dtype = None
+
+    try:
+        stacktype = main.STACK_TYPES.index(dtype)
+    except Exception:
+        stacktype = [i for i, x in enumerate(main.STACK_TYPES) if x == dtype][0]
+
+    if isinstance(val, str):
+        data = val.encode(main._encoding) + b'\x00'
+    else:
+        data = ctypes.string_at(ctypes.addressof(dtype(val)), size=ctypes.sizeof(dtype))
+
+    self._API.XeprPushValue(stacktype, data, len(data))
+
+
+xepr = XeprAPI.Xepr()
+exp = xepr.XeprExperiment()
+parname = exp.findParam('CenterField') or exp.findParam('NbScansToDo')
+if parname is None:
+    print("Please set up an experiment with a field or scan parameter before you run the script")
+    sys.exit(1)
+
+
+def read_parameter():
+    exp.aqGetParType(parname)
+    exp.aqGetRealParValue(parname, 0, xepr.NIL)
+
+
+def per_call_us():
+    # each read_parameter() issues two ProDeL calls
+    return 1e6 * min(timeit.repeat(read_parameter, number=NUMBER_OF_CALLS // 2, repeat=3)) / NUMBER_OF_CALLS
+
+
+print("Timing %u calls per run, parameter '%s'..." % (NUMBER_OF_CALLS, parname))
+t_new = per_call_us()
+
+xepr._pushvalue = types.MethodType(legacy_pushvalue, xepr)
+xepr._popvalue = types.MethodType(legacy_popvalue, xepr)
+t_legacy = per_call_us()
+del xepr._pushvalue, xepr._popvalue
+
+print("isinstance-chain marshalling: %8.2f us per call" % t_legacy)
+print("dispatch-table marshalling:   %8.2f us per call" % t_new)
+print("saved per call:               %8.2f us (%.0f%%)" % (t_legacy - t_new, 100.0 * (t_legacy - t_new) / t_legacy))
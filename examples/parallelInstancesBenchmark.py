@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+#
+# parallelInstancesBenchmark.py
+#
+# This script demonstrates how to
+#       - connect to several Xepr instances from one Python process
+#       - drive the connections concurrently from separate threads
+#
+# It measures the rate of ProDeL calls with 1, 2, ... of the available
+# Xepr instances driven in parallel. Since every connection has its own
+# lock and library state, the total rate should scale about linearly with
+# the number of instances.
+#
+#
+# Note: Prior to running any Xepr API scripts, the Xepr API has to be
+#       enabled in every Xepr instance by selecting the menu item "Enable
+#       Xepr API" from the "XeprAPI" sub-menu of the "Processing" menu.
+#
+
+
+CALLS_PER_INSTANCE = 5000
+
+
+import os, sys; sys.path.insert(0, os.popen("Xepr --apipath").read())  # this locates the XeprAPI module
+
+import threading
+import time
+
+import XeprAPI
+
+
+pids = sorted(XeprAPI.getXeprInstances())
+if len(pids) < 2:
+    print("Please start at least two Xepr instances and enable the Xepr API in each of them")
+    sys.exit(1)
+
+connections = [XeprAPI.Xepr(pid=pid) for pid in pids]
+
+
+def hammer(xepr):
+    for i in range(CALLS_PER_INSTANCE):
+        xepr.XeprActive()
+        xepr.aqGetSelectedExp(-1)
+
+
+print("Each thread issues %u ProDeL calls through its own connection." % (2 * CALLS_PER_INSTANCE))
+rate_single = None
+for n in range(1, len(connections) + 1):
+    threads = [threading.Thread(target=hammer, args=(xepr,)) for xepr in connections[:n]]
+    t0 = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    rate = 2 * CALLS_PER_INSTANCE * n / (time.time() - t0)
+    rate_single = rate_single or rate
+    print("%u instance(s): %10.0f calls/s, speed-up %.2f (ideal %u)" % (n, rate, rate / rate_single, n))
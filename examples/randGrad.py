@@ -63,6 +63,8 @@ else:    # for CW
                           addgrad=True)
 print "done."
 
+exp.cachevalues = True      # skip writing parameters that already have the value to be set
+
 
 
 # preset the pulse table (if we're going to run a pulse experiment)
@@ -124,12 +126,10 @@ for slice_no in slice_numbers:
 
     # now run the 1D experiment and wait for it to complete
     if slice_no == 0:               # the first experiment is started by the Xepr operator
-        while not exp.isRunning:    # poll experiment state
-            time.sleep(1e-3)        # sleep for e.g. 1 ms
+        exp.waitFor("isRunning")    # poll experiment state (at least every 100 ms)
         Xepr.printLn("Running the 1D experiment %u times...please be patient..." % NUMBER_OF_SLICES)
         print "Acquiring the 1st slice (of %u)..." % NUMBER_OF_SLICES
-        while exp.isRunning:        # poll experiment state
-            time.sleep(1e-3)        # sleep for e.g. 1 ms
+        exp.waitUntil(lambda: not exp.isRunning)    # poll experiment state
     else:
         print "Acquiring the %u. slice (of %u)..." % (slice_no+1, NUMBER_OF_SLICES)
         exp.aqExpRunAndWait()       # the other slices are acquired by the script